@@ -0,0 +1,116 @@
+# Modules/AtomicFile.py (säkra filskrivningar för AuthDB och topplistan, även med flera spelinstanser)
+import os, threading
+
+try:
+    import fcntl
+
+    def _lock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+    def _unlock_fd(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_fd(fd):
+        # LK_LOCK försöker i 10 sekunder innan det ger upp med OSError
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+    def _unlock_fd(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def fsync_dir(path):
+    """ Gör ett namnbyte i katalogen hållbart. Går inte på Windows (kataloger kan inte öppnas), där hoppar vi över."""
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_bytes(path, data: bytes):
+    """ Atomisk skrivning: temporär fil i samma katalog, fsync, os.replace över den gamla filen.
+    En krasch mitt i lämnar alltid antingen den gamla eller den nya filen hel."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    fsync_dir(os.path.dirname(path))
+
+
+def fsync_file(path) -> bool:
+    """ fsync på en fil som redan skrivits (t.ex. journalen). False om filen inte finns."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return True
+
+
+class FileLock:
+    """ Rådgivande lås på en låsfil, delat mellan processer (flock/msvcrt) och trådar (RLock).
+    Kan tas flera gånger av samma tråd; filen låses bara vid första och släpps vid sista.
+    flock-lås hör till den öppnade filen och delas med barnprocesser efter fork, så en ny process
+    öppnar låsfilen på nytt i stället för att ärva förälderns."""
+
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.fd = None
+        self.pid = None
+        self.depth = 0
+
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                if self.fd is not None and self.pid != os.getpid():
+                    os.close(self.fd)
+                    self.fd = None
+                if self.fd is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                    self.pid = os.getpid()
+                _lock_fd(self.fd)
+            except BaseException:
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            _unlock_fd(self.fd)
+        self.thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def close(self):
+        with self.thread_lock:
+            if self.fd is not None and self.depth == 0:
+                os.close(self.fd)
+                self.fd = None
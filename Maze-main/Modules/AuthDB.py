@@ -1,158 +1,794 @@
-# Modules/AuthDB.py (vår pickle-baserade lagring)
-import os, hashlib, secrets, time, pickle
+# Modules/AuthDB.py (vår lagring: pickle som standard, SQLite som alternativ backend)
+import os, hashlib, hmac, secrets, time, pickle, atexit, struct, zlib, threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
 from typing import List, Tuple, Optional
+from . import AtomicFile, AuthSQLite, AuthWriter, Leaderboard, Retention
 
 DB_PATH = "data/game.pickle"
+SQLITE_PATH = "data/game.sqlite"
 
-def _ensure_dir():
-    os.makedirs("data", exist_ok=True)
+# Vilken lagring API:t använder: "pickle" eller "sqlite" (byt med use_backend)
+BACKEND = "pickle"
+
+# När ändringar görs hållbara på disken (pickle: fsync av journalen, SQLite: commit):
+# - "background": av skrivtråden (AuthWriter) direkt efter ändringen, så spelloopen aldrig väntar på disken
+# - "immediate":  direkt vid varje ändring, i den tråd som gjorde ändringen
+# - "debounced":  när FLUSH_DEBOUNCE_SEC gått sedan första osparade ändringen (kollas vid nästa anrop, bara pickle)
+# - "shutdown":   först vid flush()/programslut (bara pickle)
+# Pickle: resultat och progress köas i minnet och skrivs till journalen (under låsfilen) av flush(), alltså i
+# skrivtråden som standard; nya användare, lösenord och rensningar skrivs direkt så att andra spelinstanser ser dem.
+FLUSH_POLICY = "background"
+FLUSH_DEBOUNCE_SEC = 2.0
+
+# Lösenordshashning (KDF). Varje användare sparar vilken algoritm och hur många iterationer hens hash
+# gjordes med; loggar man in med en äldre inställning hashas lösenordet om med den nuvarande.
+# Välj iterationer för den här datorn med OtherResources/Programs/KDFCalibration.py.
+KDF_ALGORITHM = "pbkdf2_sha256"
+KDF_ITERATIONS = 100_000
+KDF_ALGORITHMS = {"pbkdf2_sha256": "sha256", "pbkdf2_sha512": "sha512"}
+# Användare skapade innan KDF:en sparades per användare
+LEGACY_KDF = ("pbkdf2_sha256", 100_000)
+
+# Alla ändringar skrivs som små poster i en journal bredvid pickle-filen (DB_PATH + ".journal")
+# i stället för att hela databasen sparas om. När journalen blir större än så här skrivs en ny
+# pickle-snapshot och journalen töms (kompaktering).
+JOURNAL_COMPACT_BYTES = 256 * 1024
+# Varje post: längd (4 byte) + crc32 (4 byte) + pickle av posten
+_JOURNAL_HEADER = struct.Struct(">II")
+
+# Rensning av resultat (se Retention.plan): per användare och nivå sparas första, bästa och de
+# RETENTION_KEEP_LAST senaste resultaten; övriga rullas upp till dagsstatistik (daily_stats).
+# Topplistan påverkas inte. Skrivtråden gör ett varv efter start och sedan var RETENTION_EVERY:e
+# nytt resultat (0 = aldrig automatiskt, anropa retain() själv), RETENTION_BATCH resultat åt gången.
+RETENTION_KEEP_LAST = 20
+RETENTION_EVERY = 1000
+RETENTION_BATCH = 5000
+
+def _ensure_dir(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
 
 def _default_db():
     """ Vår "databas" som en Python-dict:
     - users:     lista av användare
     - scores:    lista av resultat
-    - counters:  enkla räknare för användarid)"""
-    return {"users": [], "scores": [], "counters": {"users": 0, "scores": 0}}
+    - rollups:   (dag, nivå) -> statistik för resultat som rensats bort (Retention)
+    - counters:  enkla räknare för användarid, resultat och senaste journalpost i snapshoten)"""
+    return {"users": [], "scores": [], "rollups": {}, "counters": {"users": 0, "scores": 0, "journal": 0}}
 
-def _load_db():
-    _ensure_dir()
-    if not os.path.exists(DB_PATH):
+def _read_db(path):
+    _ensure_dir(path)
+    if not os.path.exists(path):
         return _default_db()
-    with open(DB_PATH, "rb") as f:
+    with open(path, "rb") as f:
         db = pickle.load(f)
     # Säkerställ att alla nycklar finns (om vi ändrar struktur senare)
     if "users" not in db: db["users"] = []
     if "scores" not in db: db["scores"] = []
+    if "rollups" not in db: db["rollups"] = {}
     if "counters" not in db: db["counters"] = {"users": 0, "scores": 0}
-    # Alla användare ska alltid ha en progress-lista (vilka länder som är klara)
+    db["counters"].setdefault("journal", 0)
+    # Alla användare ska alltid ha en progress (vilka länder som är klara). Den lagras som en dict
+    # land -> True: konstant tid för "finns/lägg till/ta bort" men samma ordning som när den var en lista
     for u in db["users"]:
-        if "progress" not in u:
-            u["progress"] = []
+        u["progress"] = dict.fromkeys(u.get("progress", ()), True)
+        u.setdefault("kdf", LEGACY_KDF)
     return db
 
-def _save_db(db):
-    """ Sparar hela databasen (dict) till fil """
-    with open(DB_PATH, "wb") as f:
-        pickle.dump(db, f)
+def _journal_path(path):
+    return path + ".journal"
+
+def _read_journal(path, offset=0):
+    """ Läser journalens poster från offset och framåt. Returnerar (poster, offset efter sista hela posten).
+    En trasig sista post (t.ex. strömavbrott mitt i en skrivning) kapas bort så att nästa post hamnar
+    direkt efter den sista hela. Anropas med låsfilen låst."""
+    records = []
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return records, 0
+    with f:
+        f.seek(offset)
+        data = f.read()
+        pos = 0
+        while pos + _JOURNAL_HEADER.size <= len(data):
+            length, crc = _JOURNAL_HEADER.unpack_from(data, pos)
+            payload = data[pos + _JOURNAL_HEADER.size:pos + _JOURNAL_HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            records.append(pickle.loads(payload))
+            pos += _JOURNAL_HEADER.size + length
+        if pos < len(data):
+            f.truncate(offset + pos)
+    return records, offset + pos
+
+def _append_journal(path, records) -> int:
+    """ En sekventiell skrivning för alla poster; fsync görs sedan av flush(). Returnerar antal skrivna byte."""
+    chunks = []
+    for record in records:
+        payload = pickle.dumps(record)
+        chunks.append(_JOURNAL_HEADER.pack(len(payload), zlib.crc32(payload)))
+        chunks.append(payload)
+    data = b"".join(chunks)
+    with open(path, "ab") as f:
+        f.write(data)
+    return len(data)
+
+def _truncate_journal(path, offset):
+    """ Kapar journalen vid offset (anropas med låsfilen låst), t.ex. efter en skrivning som misslyckats halvvägs."""
+    try:
+        with open(path, "r+b") as f:
+            f.truncate(offset)
+    except FileNotFoundError:
+        pass
+
+def _apply(db, record, users_by_id, users_by_name):
+    """ Spelar upp en journalpost: (nr, "user", användar-dict), (nr, "score", resultat-dict),
+    (nr, "progress", user_id, land, True/False), (nr, "password", user_id, salt, hash, kdf)
+    eller (nr, "prune", [resultat-id i stigande ordning]) som rullar upp resultaten till rollups."""
+    seq, kind = record[0], record[1]
+    if kind == "score":
+        db["scores"].append(record[2])
+        db["counters"]["scores"] = max(db["counters"]["scores"], record[2]["id"])
+    elif kind == "user":
+        u = dict(record[2], progress={})
+        db["users"].append(u)
+        db["counters"]["users"] = max(db["counters"]["users"], u["id"])
+        users_by_id[u["id"]] = u
+        users_by_name[u["username"]] = u
+    elif kind == "progress":
+        user_id, country_id, done = record[2:]
+        u = users_by_id.get(user_id)
+        if u is not None:
+            if done:
+                u["progress"][country_id] = True
+            else:
+                u["progress"].pop(country_id, None)
+    elif kind == "password":
+        user_id, pw_salt, pw_hash, kdf = record[2:]
+        u = users_by_id.get(user_id)
+        if u is not None:
+            u["pw_salt"], u["pw_hash"], u["kdf"] = pw_salt, pw_hash, kdf
+    elif kind == "prune":
+        ids = set(record[2])
+        if ids:
+            # Resultaten ligger i id-ordning: bara biten mellan minsta och största id behöver gås igenom
+            scores = db["scores"]
+            lo = bisect_left(scores, min(ids), key=lambda s: s["id"])
+            hi = bisect_right(scores, max(ids), key=lambda s: s["id"])
+            kept = []
+            for s in scores[lo:hi]:
+                if s["id"] in ids:
+                    Retention.add(db["rollups"], s)
+                else:
+                    kept.append(s)
+            scores[lo:hi] = kept
+    db["counters"]["journal"] = seq
+
+def _replay(db, records, users_by_id, users_by_name) -> int:
+    replayed = 0
+    for record in records:
+        # Poster som redan finns i snapshoten (krasch mellan snapshot och tömning av journalen) hoppas över
+        if record[0] > db["counters"]["journal"]:
+            _apply(db, record, users_by_id, users_by_name)
+            replayed += 1
+    return replayed
+
+def _load_db(path):
+    """ Snapshot + de journalposter som kommit efter den.
+    Returnerar (db, antal uppspelade poster, hur långt i journalen vi läst)."""
+    db = _read_db(path)
+    records, offset = _read_journal(_journal_path(path))
+    replayed = _replay(db, records, {u["id"]: u for u in db["users"]}, {u["username"]: u for u in db["users"]})
+    return db, replayed, offset
+
+class PickleStore:
+    """ Pickle-backend: en snapshot (pickle-filen) plus en journal med alla ändringar efter den.
+    Databasen hålls i minnet; varje skrivning är en transaktion under låsfilen (DB_PATH + ".lock"):
+    läs in det andra spelinstanser hunnit skriva i journalen, ge posterna nästa nummer/id, lägg till dem
+    sist i journalen. Alla instanser kan alltså lägga till resultat utan att skriva om hela filen.
+    Resultat och progress från spelet köas bara (pending) och skrivs av flush() i skrivtråden, så spelloopen
+    aldrig väntar på låsfilen eller på att läsa in en annan instans kompaktering.
+    - lock:           AuthDB:s trådlås, hålls av den som läser/ändrar i minnet (spelet, skrivtråden, inloggningen)
+    - file_lock:      låsfilen; tas efter lock, utom i skrivtråden som tar den först (se _acquire_both)
+    - snap_stamp:     (mtime, storlek, inode) på snapshoten när den lästes; ändras den har någon kompakterat
+    - journal_offset: hur långt i journalen vi läst/skrivit; är journalen längre har någon annan skrivit
+    - pending:        köade poster utan nummer, ("score", resultat utan id) och ("progress", user_id, land, True/False)
+    - dirty_since:    när första köade eller inte fsync:ade posten kom (None = allt på disk)
+    - by_name/by_id:  index användarnamn -> användare och id -> användare"""
+    name = "pickle"
+
+    def __init__(self, path, lock):
+        self.path = path
+        self.journal_path = _journal_path(path)
+        self.lock = lock
+        self.file_lock = AtomicFile.FileLock(path + ".lock")
+        self.db = None
+        self.snap_stamp = None
+        self.journal_offset = 0
+        self.dirty_since = None
+        self.pending = []
+        self.replayed = 0
+        self.by_name = {}
+        self.by_id = {}
+        self.loads = 0
+        self.catch_ups = 0
+        self.saves = 0
+        self.appends = 0
+        self.syncs = 0
+
+    def _snapshot_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _journal_size(self) -> int:
+        try:
+            return os.stat(self.journal_path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _changed(self) -> bool:
+        return self._snapshot_stamp() != self.snap_stamp or self._journal_size() != self.journal_offset
+
+    def _sync_from_disk(self, ahead=None):
+        """ Läser in det som ändrats på disk sedan sist (anropas med lock och file_lock).
+        Ny snapshot = någon har kompakterat, läs om allt (eller ta ahead från _acquire_both om det är den);
+        annars bara de nya journalposterna."""
+        stamp = self._snapshot_stamp()
+        if self.db is None or stamp != self.snap_stamp:
+            self._install(ahead[0] if ahead is not None and ahead[1] == stamp else _load_db(self.path), stamp)
+        elif self._journal_size() != self.journal_offset:
+            records, self.journal_offset = _read_journal(self.journal_path, self.journal_offset)
+            self.replayed += _replay(self.db, records, self.by_id, self.by_name)
+            self.catch_ups += 1
+
+    def _install(self, loaded, stamp):
+        self.db, self.replayed, self.journal_offset = loaded
+        self.snap_stamp = stamp
+        self._reindex()
+        self.loads += 1
+
+    def load(self):
+        if self.db is None or self._changed():
+            with self.file_lock:
+                self._sync_from_disk()
+        self.maybe_flush()
+        return self.db
+
+    @contextmanager
+    def transaction(self):
+        """ Läs-ändra-skriv: låsfilen hålls och databasen i minnet är ikapp med disken under with-blocket."""
+        with self.file_lock:
+            self._sync_from_disk()
+            yield self.db
+
+    def _append(self, kind, *args):
+        """ Lägger till en post direkt (anropas inne i transaction()).
+        Posten fsync:as enligt FLUSH_POLICY (i skrivtråden som standard)."""
+        self._write([(kind,) + args])
+        self.maybe_flush()
+
+    def _queue(self, kind, *args):
+        """ Köar en post till nästa flush(); ingen fil rörs här (anropas med lock, t.ex. från spelloopen)."""
+        self.pending.append((kind,) + args)
+        self._mark_dirty()
+
+    def _write(self, entries):
+        """ Numrerar posterna, skriver dem sist i journalen och spelar sedan upp dem i minnet (anropas med lock
+        och file_lock, efter _sync_from_disk). Resultat utan id får nästa lediga id. Journalen skrivs först:
+        misslyckas skrivningen kapas den tillbaka till journal_offset och minnet är orört, så ingen halv post
+        blir kvar (_read_journal skulle annars kapa bort alla poster efter den, även andra instansers)."""
+        seq, score_id = self.db["counters"]["journal"], self.db["counters"]["scores"]
+        records = []
+        for kind, *args in entries:
+            seq += 1
+            if kind == "score" and "id" not in args[0]:
+                score_id += 1
+                args[0] = dict(args[0], id=score_id)
+            records.append((seq, kind, *args))
+        try:
+            written = _append_journal(self.journal_path, records)
+        except BaseException:
+            _truncate_journal(self.journal_path, self.journal_offset)
+            raise
+        self.journal_offset += written
+        for record in records:
+            _apply(self.db, record, self.by_id, self.by_name)
+        self.appends += 1
+        if self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+
+    def _reindex(self):
+        self.by_name = {u["username"]: u for u in self.db["users"]}
+        self.by_id = {u["id"]: u for u in self.db["users"]}
+
+    def check_indexes(self) -> List[str]:
+        """ Jämför indexen med användarlistan. Returnerar en lista med fel (tom = allt stämmer)."""
+        users = self.load()["users"]
+        problems = []
+        if len(self.by_name) != len(users):
+            problems.append(f"by_name har {len(self.by_name)} poster, users har {len(users)}")
+        if len(self.by_id) != len(users):
+            problems.append(f"by_id har {len(self.by_id)} poster, users har {len(users)}")
+        for u in users:
+            if self.by_name.get(u["username"]) is not u:
+                problems.append(f"by_name pekar fel för {u['username']!r}")
+            if self.by_id.get(u["id"]) is not u:
+                problems.append(f"by_id pekar fel för id {u['id']}")
+            if not isinstance(u["progress"], dict):
+                problems.append(f"progress för id {u['id']} är inte en dict")
+        return problems
+
+    def _mark_dirty(self):
+        if self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        if self.dirty_since is None:
+            return
+        if FLUSH_POLICY == "immediate" or (
+                FLUSH_POLICY == "debounced" and time.monotonic() - self.dirty_since >= FLUSH_DEBOUNCE_SEC):
+            self.flush()
+
+    def flush(self):
+        """ Skriver kön till journalen, fsync:ar den (utan lås) och kompakterar när den blivit stor.
+        Körs i skrivtråden som standard: det är här låsfilen tas och andra instansers poster läses in."""
+        if self.pending:
+            self._write_pending()
+        with self.lock:
+            if self.dirty_since is None:
+                return
+            self.dirty_since = None
+        # Finns inte journalen har någon kompakterat, och då ligger allt redan i en fsync:ad snapshot
+        AtomicFile.fsync_file(self.journal_path)
+        self.syncs += 1
+        if self._journal_size() > JOURNAL_COMPACT_BYTES:
+            self.compact()
+
+    def _acquire_both(self):
+        """ Skrivtråden: tar låsfilen och sedan lock, så att spelet inte väntar på lock medan vi väntar på låsfilen
+        (en annan instans kan hålla den medan den kompakterar). Har någon kompakterat läses den nya snapshoten
+        också in innan lock tas. Är lock upptaget släpps låsfilen och vi försöker igen: den som har lock kan
+        vänta på låsfilen (låsordningen är annars lock före file_lock), så det blir ingen deadlock.
+        Returnerar (_load_db(...), snapshotens stamp) eller None, till _sync_from_disk."""
+        ahead = None
+        while True:
+            self.file_lock.acquire()
+            try:
+                # snap_stamp ändras bara med låsfilen hållen
+                stamp = self._snapshot_stamp()
+                if self.db is not None and stamp != self.snap_stamp and (ahead is None or ahead[1] != stamp):
+                    ahead = _load_db(self.path), stamp
+            except BaseException:
+                self.file_lock.release()
+                raise
+            if self.lock.acquire(timeout=0.005):
+                return ahead
+            self.file_lock.release()
+            time.sleep(0.001)  # ge den som väntar på låsfilen en chans att ta den
+
+    def _write_pending(self):
+        """ Skriver kön till journalen: läser in andra instansers ändringar, numrerar och skriver posterna."""
+        # Byts databasen ut frigörs den gamla när vi är klara, inte medan lock hålls
+        old = self.db
+        ahead = self._acquire_both()
+        try:
+            entries, self.pending = self.pending, []
+            try:
+                self._sync_from_disk(ahead)
+                self._write(entries)
+            except BaseException:
+                # Inget tappas: posterna ligger kvar först i kön till nästa flush
+                self.pending[:0] = entries
+                raise
+        finally:
+            self.lock.release()
+            self.file_lock.release()
+        del old  # en utbytt databas frigörs här, med låsen släppta
+
+    def compact(self):
+        """ Skriver en ny snapshot med allt och tömmer journalen. Snapshoten skrivs atomiskt och sparar numret
+        på sista posten, så om vi kraschar innan journalen tömts hoppas de posterna över vid nästa inläsning.
+        Låsfilen hålls hela vägen så att ingen annan hinner lägga till något i journalen som sedan raderas.
+        Databasen ändras bara med låsfilen hållen, så den picklas och skrivs utan lock och spelet kan läsa under tiden."""
+        old = self.db  # se _write_pending
+        ahead = self._acquire_both()
+        try:
+            try:
+                self._sync_from_disk(ahead)
+            finally:
+                self.lock.release()
+        except BaseException:
+            self.file_lock.release()
+            raise
+        del old  # en utbytt databas frigörs här, efter att lock släppts
+        try:
+            AtomicFile.write_bytes(self.path, pickle.dumps(self.db))
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self.snap_stamp = self._snapshot_stamp()
+            self.journal_offset = 0
+            self.replayed = 0
+            self.saves += 1
+        finally:
+            self.file_lock.release()
+
+    def close(self):
+        self.flush()
+        self.file_lock.close()
+
+    def init(self):
+        # Ny fil, eller en journal kvar från förra körningen: börja med en färsk snapshot
+        self.load()
+        if not os.path.exists(self.path) or self._journal_size():
+            self.compact()
+
+    # Användare
+    def get_user_by_name(self, username: str) -> Optional[dict]:
+        self.load()
+        return self.by_name.get(username)
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        self.load()
+        return self.by_id.get(user_id)
+
+    def insert_user(self, username: str, pw_salt: bytes, pw_hash: bytes, created_at: int,
+                    kdf=LEGACY_KDF) -> Optional[int]:
+        """ Ny användare, None om namnet redan är taget (även av en annan spelinstans)."""
+        with self.transaction() as db:
+            if username in self.by_name:
+                return None
+            user_id = db["counters"]["users"] + 1
+            self._append("user", {
+                "id": user_id,
+                "username": username,
+                "pw_salt": pw_salt,
+                "pw_hash": pw_hash,
+                "kdf": tuple(kdf),  # (algoritm, iterationer) som hashen gjordes med
+                "created_at": created_at
+                # progress: här lagrar vi vilka länder spelaren låst upp (läggs till i _apply)
+            })
+        return user_id
+
+    def update_password(self, user_id: int, pw_salt: bytes, pw_hash: bytes, kdf) -> bool:
+        with self.transaction():
+            if user_id not in self.by_id:
+                return False
+            self._append("password", user_id, pw_salt, pw_hash, tuple(kdf))
+        return True
+
+    # Resultat
+    def insert_score(self, user_id: int, level: int, time_sec: int, created_at: int) -> Optional[int]:
+        """ Köar resultatet. Returnerar None: id:t ges när flush() skriver det (se queued_score_id)."""
+        self._queue("score", {
+            "user_id": user_id,
+            "level": level,
+            "time_sec": time_sec,
+            "created_at": created_at
+        })
+        return None
+
+    def queued_score_id(self) -> int:
+        """ Preliminärt id för senast köade resultatet: det id:t får det om ingen annan instans hinner skriva
+        resultat före, annars ett större. Räknas ur minnet utan att röra några filer (anropas från spelloopen)."""
+        if self.db is None:
+            self.load()
+        return self.db["counters"]["scores"] + sum(1 for kind, *_ in self.pending if kind == "score")
+
+    def iter_scores(self, after_id: int = 0):
+        # Resultaten ligger i id-ordning (de får sina id under låsfilen), så vi kan hoppa direkt till after_id
+        scores = self.load()["scores"]
+        return iter(scores[bisect_right(scores, after_id, key=lambda s: s["id"]):])
+
+    def last_score_id(self) -> int:
+        return self.load()["counters"]["scores"]
+
+    def plan_retention(self, keep_last: int) -> List[int]:
+        """ Anropas utan lock: listan kopieras med lock hållet, planen görs utan så spelet inte väntar."""
+        with self.lock:
+            scores = list(self.load()["scores"])
+        return Retention.plan([(s["id"], s["user_id"], s["level"], s["time_sec"]) for s in scores], keep_last)
+
+    def prune_scores(self, ids: List[int]) -> int:
+        """ Rullar upp resultaten med dessa id (en journalpost). Returnerar hur många som fanns kvar att rulla upp."""
+        with self.transaction() as db:
+            before = len(db["scores"])
+            self._append("prune", sorted(ids))
+            return before - len(db["scores"])
+
+    def rollups(self, level: int) -> dict:
+        return {day: r for (day, lvl), r in self.load()["rollups"].items() if lvl == level}
+
+    # Progress
+    def _progress(self, u) -> dict:
+        """ Användarens progress med köade ändringar som flush() inte hunnit skriva."""
+        progress = u["progress"]
+        for kind, *args in self.pending:
+            if kind == "progress" and args[0] == u["id"]:
+                if progress is u["progress"]:
+                    progress = dict(progress)
+                if args[2]:
+                    progress[args[1]] = True
+                else:
+                    progress.pop(args[1], None)
+        return progress
+
+    def _set_progress(self, user_id: int, country_id: str, done: bool) -> bool:
+        # Ur minnet utan load(): anropas från spelloopen och ska inte röra några filer
+        if self.db is None:
+            self.load()
+        u = self.by_id.get(user_id)
+        if u is None:
+            return False
+        if (country_id in self._progress(u)) != done:
+            self._queue("progress", user_id, country_id, done)
+        return True
+
+    def add_progress(self, user_id: int, country_id: str) -> bool:
+        return self._set_progress(user_id, country_id, True)
+
+    def remove_progress(self, user_id: int, country_id: str) -> bool:
+        return self._set_progress(user_id, country_id, False)
+
+    def get_progress(self, user_id: int) -> Optional[List[str]]:
+        u = self.get_user(user_id)
+        return None if u is None else list(self._progress(u))
+
+    def has_access(self, user_id: int, country_id: str) -> bool:
+        u = self.get_user(user_id)
+        return u is not None and country_id in self._progress(u)
+
+_active = None
+_board = None
+# Nya resultat sedan förra rensningen (skrivtråden rensar när det blivit RETENTION_EVERY)
+_unretained = 0
+# Skyddar backend och topplistor: spelet och skrivtråden (och inloggningstråden) delar på dem
+_lock = threading.RLock()
+
+def _store():
+    """Aktiv backend enligt BACKEND (följer med om DB_PATH/SQLITE_PATH byts, t.ex. i benchmark/testfall).
+    Anropas med _lock hållet."""
+    global _active
+    path = SQLITE_PATH if BACKEND == "sqlite" else DB_PATH
+    if _active is None or _active.name != BACKEND or _active.path != path:
+        if _active is not None:
+            _active.close()
+        if BACKEND == "sqlite":
+            _active = AuthSQLite.SQLiteStore(path, _lock)
+        else:
+            _active = PickleStore(path, _lock)
+    # SQLite: commit direkt vid varje ändring, utom när skrivtråden sköter det
+    _active.autocommit = FLUSH_POLICY != "background"
+    return _active
+
+def use_backend(name: str):
+    """Byter lagring ("pickle" eller "sqlite"). Anropa init_db() efteråt."""
+    global BACKEND
+    if name not in ("pickle", "sqlite"):
+        raise ValueError(f"Okänd backend: {name}")
+    BACKEND = name
+
+def _leaderboard() -> Leaderboard.Leaderboards:
+    """Topplistorna för aktiv backend, ikapp med databasen (sparas i <databasfil>.leaderboard)."""
+    global _board
+    store = _store()
+    path = store.path + ".leaderboard"
+    if _board is None or _board.path != path:
+        _board = Leaderboard.Leaderboards(path)
+        _board.load()
+    _board.catch_up(store.last_score_id(), store.iter_scores)
+    return _board
+
+def flush():
+    """Skriver osparade ändringar till fil direkt, i den här tråden.
+    Köade resultat (pickle) får sina riktiga id här, och topplistan byter till dem."""
+    store, board = _active, _board
+    if store is not None:
+        store.flush()
+    if board is not None:
+        with _lock:
+            if store is not None and _active is store:
+                board = _leaderboard()
+            board.save()
+
+def _background():
+    """Skrivtrådens jobb: flush, och ett varv rensning när tillräckligt många nya resultat kommit."""
+    global _unretained
+    flush()
+    if RETENTION_EVERY and _unretained >= RETENTION_EVERY:
+        _unretained = 0
+        retain()
+
+# Skrivtråden; den kör _background() efter ändringar när FLUSH_POLICY är "background"
+_writer = AuthWriter.Writer(_background)
+# Bara en rensning åt gången (skrivtråden eller den som anropar retain())
+_retain_lock = threading.Lock()
+
+def _written():
+    """Anropas efter varje ändring."""
+    if FLUSH_POLICY == "background":
+        _writer.notify()
+
+def shutdown():
+    """Skriver klart kön, stoppar skrivtråden och sparar det sista (settings.Quit och vid programslut)."""
+    _writer.shutdown()
+    flush()
+
+def writer_stats() -> dict:
+    """Mätvärden för skrivtråden: köns längd, antal flushar och hur lång tid de tagit."""
+    return _writer.stats()
+
+atexit.register(shutdown)
 
 #  Publika API:t för användarhantering, resultat och progress
 def init_db():
-    """Initierar filen om den saknas, så resten av koden kan anta rätt struktur."""
-    db = _load_db()
-    _save_db(db)
+    """Initierar lagringen om den saknas, så resten av koden kan anta rätt struktur.
+    För SQLite flyttas en befintlig pickle-databas över första gången. Skrivtråden rensar gamla resultat efteråt."""
+    global _unretained
+    with _lock:
+        _unretained = RETENTION_EVERY
+        store = _store()
+        store.init()
+        if store.name == "sqlite" and os.path.exists(DB_PATH):
+            AuthSQLite.migrate_pickle(lambda: _load_db(DB_PATH)[0], store)
+        _leaderboard().save()
+    _written()
 
-def _hash_password(password: str, salt: bytes) -> bytes:
-    """ Returnerar en hash av lösenordet med angivet salt """
-    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100_000)
+def _current_kdf():
+    return (KDF_ALGORITHM, KDF_ITERATIONS)
+
+def _hash_password(password: str, salt: bytes, kdf=LEGACY_KDF) -> bytes:
+    """ Returnerar en hash av lösenordet med angivet salt och kdf = (algoritm, iterationer) """
+    algorithm, iterations = kdf
+    return hashlib.pbkdf2_hmac(KDF_ALGORITHMS[algorithm], password.encode("utf-8"), salt, int(iterations))
 
 def create_user(username: str, password: str):
     """ Skapa användare: unikt namn, spara salt + hash + tom progress"""
     username = username.strip()
     if len(username) < 3 or len(password) < 3:
         return False, "Användarnamn och lösenord måste vara minst 3 tecken."
-    db = _load_db()
-    for u in db["users"]:
-        if u["username"] == username:
+    with _lock:
+        if _store().get_user_by_name(username) is not None:
             return False, "Användarnamnet är upptaget."
+    # Hashningen tar tid, den görs utan lås så att spelet/skrivtråden inte väntar på den
+    kdf = _current_kdf()
     salt = secrets.token_bytes(16)
-    pw_hash = _hash_password(password, salt)
-    db["counters"]["users"] += 1
-    user_rec = {
-        "id": db["counters"]["users"],
-        "username": username,
-        "pw_salt": salt,
-        "pw_hash": pw_hash,
-        "created_at": int(time.time()),
-        "progress": []  # här lagrar vi vilka länder spelaren låst upp
-    }
-    db["users"].append(user_rec)
-    _save_db(db)
-    return True, {"user_id": user_rec["id"]}
+    pw_hash = _hash_password(password, salt, kdf)
+    with _lock:
+        # Namnet kan ha tagits under tiden (även av en annan spelinstans); insert_user kollar igen
+        user_id = _store().insert_user(username, salt, pw_hash, int(time.time()), kdf)
+    if user_id is None:
+        return False, "Användarnamnet är upptaget."
+    _written()
+    return True, {"user_id": user_id}
 
 def verify_user(username: str, password: str):
     # autentiserar genom att hasha inmatningen med lagrat salt och jämför med hash
-    db = _load_db()
-    for u in db["users"]:
-        if u["username"] == username.strip():
-            if _hash_password(password, u["pw_salt"]) == u["pw_hash"]:
-                return True, {"user_id": u["id"]}
-            else:
-                return False, "Fel lösenord."
-    return False, "Hittar inte användaren."
+    with _lock:
+        u = _store().get_user_by_name(username.strip())
+    if u is None:
+        return False, "Hittar inte användaren."
+    kdf = tuple(u.get("kdf", LEGACY_KDF))
+    if not hmac.compare_digest(_hash_password(password, u["pw_salt"], kdf), u["pw_hash"]):
+        return False, "Fel lösenord."
+    if kdf != _current_kdf():
+        # Rätt lösenord men gammal KDF-inställning: hasha om med den nuvarande
+        salt = secrets.token_bytes(16)
+        pw_hash = _hash_password(password, salt, _current_kdf())
+        with _lock:
+            _store().update_password(u["id"], salt, pw_hash, _current_kdf())
+        _written()
+    return True, {"user_id": u["id"]}
 
 def record_score(user_id: int, level: int, time_sec: int):
-    """ Spara ett resultat. används för leaderboard-logik."""
-    db = _load_db()
-    db["counters"]["scores"] += 1
-    score_rec = {
-        "id": db["counters"]["scores"],
-        "user_id": int(user_id),
-        "level": int(level),
-        "time_sec": int(time_sec),
-        "created_at": int(time.time())
-    }
-    db["scores"].append(score_rec)
-    _save_db(db)
+    """ Spara ett resultat. används för leaderboard-logik.
+    Pickle köar resultatet och skrivtråden ger det ett id; topplistan tar med det direkt med ett preliminärt id."""
+    global _unretained
+    with _lock:
+        score = {"user_id": int(user_id), "level": int(level), "time_sec": int(time_sec), "created_at": int(time.time())}
+        store = _store()
+        score["id"] = store.insert_score(score["user_id"], score["level"], score["time_sec"], score["created_at"])
+        if score["id"] is not None:
+            _leaderboard().record(score)
+        else:
+            # Topplistan som den är, utan catch_up (som läser in från disk); skrivtråden tar den sedan
+            board = _board if _board is not None and _board.path == store.path + ".leaderboard" else _leaderboard()
+            board.add_pending(score, store.queued_score_id())
+        _unretained += 1
+    _written()
+
+def _username(user_id: int) -> str:
+    u = _store().get_user(user_id)
+    return f"User {user_id}" if u is None else u["username"]
 
 def top_times(level: int, limit: int = 10) -> List[Tuple[str, int]]:
     """Returnerar [(username, bästa_tid)] för vald level, sorterat snabbast först."""
-    db = _load_db()
-    id2name = {u["id"]: u["username"] for u in db["users"]}
-    best_per_user = {}
-    for s in db["scores"]:
-        if s["level"] != int(level):
-            continue
-        uid = s["user_id"]
-        best = best_per_user.get(uid)
-        if best is None or s["time_sec"] < best:
-            best_per_user[uid] = s["time_sec"]
-    rows = [(id2name.get(uid, f"User {uid}"), best) for uid, best in best_per_user.items()]
-    rows.sort(key=lambda x: x[1])
-    return rows[:limit]
+    with _lock:
+        return [(_username(uid), best) for uid, best in _leaderboard().level(int(level)).top(limit)]
+
+def rank_of_user(user_id: int, level: int) -> Optional[int]:
+    """Spelarens placering på nivåns topplista (1 = snabbast), None om nivån inte är klarad."""
+    with _lock:
+        return _leaderboard().level(int(level)).rank(int(user_id))
+
+def players_around(user_id: int, level: int, radius: int = 2) -> List[Tuple[int, str, int]]:
+    """[(placering, username, bästa_tid)] för spelaren och radius spelare före/efter på topplistan."""
+    with _lock:
+        board = _leaderboard().level(int(level))
+        return [(rank, _username(uid), best) for rank, uid, best in board.around(int(user_id), radius)]
+
+def retain(keep_last: Optional[int] = None) -> int:
+    """ Rullar upp gamla resultat till dagsstatistik: allt utom varje användares första, bästa och keep_last
+    senaste resultat per nivå (standard RETENTION_KEEP_LAST). Topplistorna blir desamma.
+    Planen görs utan _lock och resultaten tas bort RETENTION_BATCH åt gången, så spelet bara väntar på
+    korta steg. Returnerar antal upprullade resultat."""
+    keep_last = RETENTION_KEEP_LAST if keep_last is None else int(keep_last)
+    if keep_last < 1:
+        # Senaste resultatet ska alltid finnas kvar: dess id är det topplistan räknat in till
+        raise ValueError("keep_last måste vara minst 1")
+    removed = 0
+    with _retain_lock:
+        with _lock:
+            store = _store()
+        ids = store.plan_retention(keep_last)
+        for start in range(0, len(ids), RETENTION_BATCH):
+            if threading.current_thread() is _writer.thread and _writer.stopping:
+                break  # programmet avslutas; resten tas nästa gång
+            with _lock:
+                if _active is not store:
+                    break  # backend bytt under tiden
+                removed += store.prune_scores(ids[start:start + RETENTION_BATCH])
+            _written()
+    return removed
+
+def daily_stats(level: int) -> List[dict]:
+    """[{"day", "count", "min", "mean", "buckets"}] per dag för nivån, både upprullade och kvarvarande resultat.
+    buckets räknar tider per intervall i Retention.BUCKET_EDGES."""
+    with _lock:
+        store = _store()
+        return Retention.daily_stats(store.rollups(int(level)), store.iter_scores(), int(level))
+
+def leaderboard_version() -> int:
+    """Ökar när någon topplista ändras, så att UI:t vet när det måste rita om."""
+    with _lock:
+        return _leaderboard().version
 
 #Progress/land-logik
 def add_country_progress(user_id: int, country_id: str) -> bool:
     """Markera att användaren klarat ett land (används för upplåsning i UI)"""
-    db = _load_db()
-    for u in db["users"]:
-        if u["id"] == int(user_id):
-            if country_id not in u["progress"]:
-                u["progress"].append(country_id)
-            _save_db(db)
-            return True
-    return False
+    with _lock:
+        ok = _store().add_progress(int(user_id), country_id)
+    _written()
+    return ok
 
 def remove_country_progress(user_id: int, country_id: str) -> bool:
     # Smidig för återställning/testfall när vi vill låsa om ett land.
-    db = _load_db()
-    for u in db["users"]:
-        if u["id"] == int(user_id):
-            if country_id in u["progress"]:
-                u["progress"].remove(country_id)
-            _save_db(db)
-            return True
-    return False
+    with _lock:
+        ok = _store().remove_progress(int(user_id), country_id)
+    _written()
+    return ok
 
 def get_progress(user_id: int) -> List[str]:
     """Hämtas av game.py för att rita rätt (öppna/låsta) land-knappar"""
-    db = _load_db()
-    for u in db["users"]:
-        if u["id"] == int(user_id):
-            return list(u.get("progress", []))
-    return []
+    with _lock:
+        return _store().get_progress(int(user_id)) or []
 
 def has_access(user_id: int, country_id: str) -> bool:
     """True om landet finns i spelarens progress (annars visas lås-ikon i UI:t)"""
-    db = _load_db()
-    for u in db["users"]:
-        if u["id"] == int(user_id):
-            return country_id in u.get("progress", [])
-    return False
+    with _lock:
+        return _store().has_access(int(user_id), country_id)
+
+def check_indexes() -> List[str]:
+    """Kontrollerar att lagringens index stämmer med datan. Tom lista = inga fel."""
+    with _lock:
+        return _store().check_indexes()
 
 # hjälpfunktion för att kunna slå upp id från användarnamn utan att röra loginflödet.
 def user_id_by_username(username: str) -> Optional[int]:
-    db = _load_db()
-    for u in db["users"]:
-        if u["username"] == username.strip():
-            return u["id"]
-    return None
\ No newline at end of file
+    with _lock:
+        u = _store().get_user_by_name(username.strip())
+    return None if u is None else u["id"]
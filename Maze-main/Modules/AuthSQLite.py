@@ -0,0 +1,260 @@
+# Modules/AuthSQLite.py (SQLite-backend för AuthDB, samma metoder som AuthDB.PickleStore)
+import os, json, sqlite3
+from itertools import islice
+from typing import List, Optional
+from . import Retention
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id          INTEGER PRIMARY KEY,
+    username    TEXT    NOT NULL,
+    pw_salt     BLOB    NOT NULL,
+    pw_hash     BLOB    NOT NULL,
+    created_at  INTEGER NOT NULL,
+    kdf_algorithm   TEXT    NOT NULL DEFAULT 'pbkdf2_sha256',
+    kdf_iterations  INTEGER NOT NULL DEFAULT 100000
+);
+CREATE UNIQUE INDEX IF NOT EXISTS users_username ON users (username);
+
+CREATE TABLE IF NOT EXISTS scores (
+    id          INTEGER PRIMARY KEY,
+    user_id     INTEGER NOT NULL,
+    level       INTEGER NOT NULL,
+    time_sec    INTEGER NOT NULL,
+    created_at  INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_level_time ON scores (level, time_sec);
+CREATE INDEX IF NOT EXISTS scores_user_level ON scores (user_id, level);
+
+CREATE TABLE IF NOT EXISTS progress (
+    user_id     INTEGER NOT NULL,
+    country_id  TEXT    NOT NULL,
+    UNIQUE (user_id, country_id)
+);
+
+CREATE TABLE IF NOT EXISTS score_rollups (
+    day         TEXT    NOT NULL,
+    level       INTEGER NOT NULL,
+    count       INTEGER NOT NULL,
+    min_time    INTEGER,
+    sum_time    INTEGER NOT NULL,
+    buckets     TEXT    NOT NULL,
+    PRIMARY KEY (day, level)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL
+);
+"""
+
+# Alla frågor är konstanta strängar med parametrar, så sqlite3 återanvänder sina förberedda statements
+USER_COLUMNS = "id, username, pw_salt, pw_hash, created_at, kdf_algorithm, kdf_iterations"
+SQL_USER_BY_NAME = f"SELECT {USER_COLUMNS} FROM users WHERE username = ?"
+SQL_USER_BY_ID = f"SELECT {USER_COLUMNS} FROM users WHERE id = ?"
+SQL_INSERT_USER = ("INSERT INTO users (username, pw_salt, pw_hash, created_at, kdf_algorithm, kdf_iterations) "
+                   "VALUES (?, ?, ?, ?, ?, ?)")
+SQL_UPDATE_PASSWORD = "UPDATE users SET pw_salt = ?, pw_hash = ?, kdf_algorithm = ?, kdf_iterations = ? WHERE id = ?"
+SQL_INSERT_SCORE = "INSERT INTO scores (user_id, level, time_sec, created_at) VALUES (?, ?, ?, ?)"
+SQL_PROGRESS = "SELECT country_id FROM progress WHERE user_id = ? ORDER BY rowid"
+SQL_HAS_ACCESS = "SELECT 1 FROM progress WHERE user_id = ? AND country_id = ?"
+SQL_ADD_PROGRESS = "INSERT OR IGNORE INTO progress (user_id, country_id) VALUES (?, ?)"
+SQL_REMOVE_PROGRESS = "DELETE FROM progress WHERE user_id = ? AND country_id = ?"
+SQL_SCORES_BETWEEN = "SELECT id, user_id, level, time_sec, created_at FROM scores WHERE id BETWEEN ? AND ?"
+SQL_DELETE_SCORE = "DELETE FROM scores WHERE id = ?"
+SQL_ROLLUP = "SELECT count, min_time, sum_time, buckets FROM score_rollups WHERE day = ? AND level = ?"
+SQL_ROLLUPS = "SELECT day, count, min_time, sum_time, buckets FROM score_rollups WHERE level = ?"
+SQL_SAVE_ROLLUP = ("INSERT OR REPLACE INTO score_rollups (day, level, count, min_time, sum_time, buckets) "
+                   "VALUES (?, ?, ?, ?, ?, ?)")
+SQL_RETENTION_ROWS = "SELECT id, user_id, level, time_sec FROM scores ORDER BY id"
+
+MIGRATE_BATCH = 5000
+# Samma som kolumnernas standardvärden: KDF:en för användare från innan den sparades per användare
+LEGACY_KDF = ("pbkdf2_sha256", 100_000)
+
+
+def _score_dict(row) -> dict:
+    return {"id": row[0], "user_id": row[1], "level": row[2], "time_sec": row[3], "created_at": row[4]}
+
+
+def _rollup_dict(count, min_time, sum_time, buckets) -> dict:
+    return {"count": count, "min": min_time, "sum": sum_time, "buckets": json.loads(buckets)}
+
+
+def _user_dict(row) -> Optional[dict]:
+    if row is None:
+        return None
+    return {"id": row[0], "username": row[1], "pw_salt": row[2], "pw_hash": row[3], "created_at": row[4],
+            "kdf": (row[5], row[6])}
+
+
+class SQLiteStore:
+    """ SQLite-backend: users/scores/progress-tabeller med index och WAL-journal.
+    - lock:       AuthDB:s lås; anslutningen delas mellan spelet och skrivtråden
+    - autocommit: commit efter varje ändring; annars committar skrivtråden via flush() och
+                  spelet läser sina egna ändringar direkt ur den öppna transaktionen
+    - reader:     egen läsanslutning för rensningens plan, så att den inte håller lock (WAL låter den läsa
+                  medan spelet skriver)"""
+    name = "sqlite"
+
+    def __init__(self, path, lock):
+        self.path = path
+        self.lock = lock
+        self.autocommit = True
+        self.reader = None
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, cached_statements=64, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def init(self):
+        with self.conn:
+            columns = [row[1] for row in self.conn.execute("PRAGMA table_info(users)")]
+            if columns and "kdf_algorithm" not in columns:
+                # Databas från innan KDF:en sparades per användare
+                self.conn.execute("ALTER TABLE users ADD COLUMN kdf_algorithm TEXT NOT NULL DEFAULT 'pbkdf2_sha256'")
+                self.conn.execute("ALTER TABLE users ADD COLUMN kdf_iterations INTEGER NOT NULL DEFAULT 100000")
+            self.conn.executescript(SCHEMA)
+
+    def _written(self):
+        if self.autocommit:
+            self.conn.commit()
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+            if self.reader is not None:
+                self.reader.close()
+
+    def check_indexes(self) -> List[str]:
+        """ SQLite:s egen kontroll av tabeller och index; tom lista = allt stämmer."""
+        rows = [row[0] for row in self.conn.execute("PRAGMA integrity_check")]
+        return [] if rows == ["ok"] else rows
+
+    # Användare
+    def get_user_by_name(self, username: str) -> Optional[dict]:
+        return _user_dict(self.conn.execute(SQL_USER_BY_NAME, (username,)).fetchone())
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        return _user_dict(self.conn.execute(SQL_USER_BY_ID, (user_id,)).fetchone())
+
+    def insert_user(self, username: str, pw_salt: bytes, pw_hash: bytes, created_at: int,
+                    kdf=LEGACY_KDF) -> Optional[int]:
+        """ Ny användare, None om namnet redan är taget (unikt index, även mot andra spelinstanser)."""
+        try:
+            user_id = self.conn.execute(SQL_INSERT_USER, (username, pw_salt, pw_hash, created_at, kdf[0], kdf[1])).lastrowid
+        except sqlite3.IntegrityError:
+            return None
+        self._written()
+        return user_id
+
+    def update_password(self, user_id: int, pw_salt: bytes, pw_hash: bytes, kdf) -> bool:
+        updated = self.conn.execute(SQL_UPDATE_PASSWORD, (pw_salt, pw_hash, kdf[0], kdf[1], user_id)).rowcount
+        self._written()
+        return updated > 0
+
+    # Resultat
+    def insert_score(self, user_id: int, level: int, time_sec: int, created_at: int) -> int:
+        score_id = self.conn.execute(SQL_INSERT_SCORE, (user_id, level, time_sec, created_at)).lastrowid
+        self._written()
+        return score_id
+
+    def iter_scores(self, after_id: int = 0):
+        cur = self.conn.execute("SELECT id, user_id, level, time_sec, created_at FROM scores WHERE id > ? ORDER BY id",
+                                (after_id,))
+        for row in cur:
+            yield _score_dict(row)
+
+    def last_score_id(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM scores").fetchone()[0]
+
+    def plan_retention(self, keep_last: int) -> List[int]:
+        """ Anropas utan lock (se AuthDB.retain); ser bara committade resultat, de nyaste kommer med nästa gång."""
+        if self.reader is None:
+            self.reader = sqlite3.connect(self.path, check_same_thread=False)
+        return Retention.plan(self.reader.execute(SQL_RETENTION_ROWS).fetchall(), keep_last)
+
+    def prune_scores(self, ids: List[int]) -> int:
+        """ Rullar upp resultaten med dessa id (i stigande ordning); borttagning och statistik i samma transaktion."""
+        wanted = set(ids)
+        rollups = {}
+        if ids:
+            for row in self.conn.execute(SQL_SCORES_BETWEEN, (ids[0], ids[-1])):
+                if row[0] in wanted:
+                    Retention.add(rollups, _score_dict(row))
+        self.conn.executemany(SQL_DELETE_SCORE, ((score_id,) for score_id in ids))
+        for (day, level), r in rollups.items():
+            old = self.conn.execute(SQL_ROLLUP, (day, level)).fetchone()
+            if old is not None:
+                r = Retention.merge(_rollup_dict(*old), r)
+            self.conn.execute(SQL_SAVE_ROLLUP, (day, level, r["count"], r["min"], r["sum"], json.dumps(r["buckets"])))
+        self._written()
+        return sum(r["count"] for r in rollups.values())
+
+    def rollups(self, level: int) -> dict:
+        return {row[0]: _rollup_dict(*row[1:]) for row in self.conn.execute(SQL_ROLLUPS, (level,))}
+
+    # Progress
+    def add_progress(self, user_id: int, country_id: str) -> bool:
+        if self.get_user(user_id) is None:
+            return False
+        self.conn.execute(SQL_ADD_PROGRESS, (user_id, country_id))
+        self._written()
+        return True
+
+    def remove_progress(self, user_id: int, country_id: str) -> bool:
+        if self.get_user(user_id) is None:
+            return False
+        self.conn.execute(SQL_REMOVE_PROGRESS, (user_id, country_id))
+        self._written()
+        return True
+
+    def get_progress(self, user_id: int) -> Optional[List[str]]:
+        if self.get_user(user_id) is None:
+            return None
+        return [row[0] for row in self.conn.execute(SQL_PROGRESS, (user_id,))]
+
+    def has_access(self, user_id: int, country_id: str) -> bool:
+        return self.conn.execute(SQL_HAS_ACCESS, (user_id, country_id)).fetchone() is not None
+
+
+def _batches(rows, size=MIGRATE_BATCH):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def migrate_pickle(load_db, store: SQLiteStore) -> bool:
+    """ Flyttar en pickle-databas till SQLite en gång (load_db returnerar AuthDB-dicten).
+    Raderna strömmas i batchar direkt ur listorna, allt i en transaktion; id:n behålls.
+    Görs inte om SQLite-databasen redan har användare eller redan migrerats."""
+    conn = store.conn
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_pickle'").fetchone() is not None:
+        return False
+    if conn.execute("SELECT 1 FROM users LIMIT 1").fetchone() is not None:
+        return False
+    db = load_db()
+    with conn:
+        for batch in _batches((u["id"], u["username"], u["pw_salt"], u["pw_hash"], u["created_at"],
+                               *u.get("kdf", LEGACY_KDF)) for u in db["users"]):
+            conn.executemany("INSERT INTO users (id, username, pw_salt, pw_hash, created_at, kdf_algorithm, kdf_iterations)"
+                             " VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        for batch in _batches((s["id"], s["user_id"], s["level"], s["time_sec"], s["created_at"])
+                              for s in db["scores"]):
+            conn.executemany("INSERT INTO scores (id, user_id, level, time_sec, created_at) VALUES (?, ?, ?, ?, ?)",
+                             batch)
+        for batch in _batches((u["id"], c) for u in db["users"] for c in u.get("progress", [])):
+            conn.executemany(SQL_ADD_PROGRESS, batch)
+        for (day, level), r in db.get("rollups", {}).items():
+            conn.execute(SQL_SAVE_ROLLUP, (day, level, r["count"], r["min"], r["sum"], json.dumps(r["buckets"])))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from_pickle', ?)",
+                     (f'{len(db["users"])} users, {len(db["scores"])} scores',))
+    return True
@@ -0,0 +1,90 @@
+# Modules/AuthWriter.py (skrivtråd för AuthDB: filskrivningar görs här i stället för i spelloopen)
+import threading, time
+
+
+class Writer:
+    """ En enda bakgrundstråd som kör flush() när det finns osparade ändringar.
+    Ändringarna ligger redan i minnet eller i AuthDB:s kö (progress och resultat syns direkt, resultaten får sina
+    id när tråden skriver dem), så tråden behöver bara skriva dem till fil. Allt som hunnit samlas sedan förra
+    varvet skrivs i samma flush.
+    - queued:  ändringar som väntar på att skrivas (kön)
+    - metrics: antal ändringar/flushar och hur lång tid flusharna tagit"""
+
+    def __init__(self, flush, name="AuthWriter"):
+        self.flush = flush
+        self.name = name
+        self.cond = threading.Condition()
+        self.queued = 0
+        self.stopping = False
+        self.thread = None
+        self.events = 0
+        self.flushes = 0
+        self.errors = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.oldest = None  # när äldsta ändringen i kön lades dit
+        self.max_wait_ms = 0.0
+
+    def notify(self):
+        """Anropas efter varje ändring; startar tråden första gången."""
+        with self.cond:
+            if self.oldest is None:
+                self.oldest = time.perf_counter()
+            self.queued += 1
+            self.events += 1
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping = False
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+            self.cond.notify()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.queued and not self.stopping:
+                    self.cond.wait()
+                if not self.queued and self.stopping:
+                    return
+                self.queued = 0
+                oldest, self.oldest = self.oldest, None
+            self._flush(oldest)
+
+    def _flush(self, oldest):
+        start = time.perf_counter()
+        try:
+            self.flush()
+        except Exception:
+            # Ändringarna finns kvar som osparade, nästa flush (eller shutdown) försöker igen
+            self.errors += 1
+        end = time.perf_counter()
+        self.flushes += 1
+        self.last_flush_ms = (end - start) * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self.total_flush_ms += self.last_flush_ms
+        if oldest is not None:
+            self.max_wait_ms = max(self.max_wait_ms, (end - oldest) * 1000)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Skriver det som ligger i kön och stoppar tråden (settings.Quit / programslut)."""
+        with self.cond:
+            self.stopping = True
+            self.cond.notify()
+            thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+        self.thread = None
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                "queue_depth": self.queued,
+                "events": self.events,
+                "flushes": self.flushes,
+                "errors": self.errors,
+                "last_flush_ms": round(self.last_flush_ms, 3),
+                "max_flush_ms": round(self.max_flush_ms, 3),
+                "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+                # längsta tid från att en ändring köades tills den låg på disk
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
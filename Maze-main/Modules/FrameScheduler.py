@@ -0,0 +1,54 @@
+import pygame
+
+
+class FrameScheduler:
+    """
+    Paces the main loop: rendering is capped at TargetFPS, game logic runs in fixed steps of 1000 / LogicFPS ms,
+    and screens that show nothing new drop to IdleFPS until the next input arrives.
+    """
+    def __init__(self, clock: pygame.time.Clock, TargetFPS: int = 60, LogicFPS: int = 120, IdleFPS: int = 10,
+                 IdleDelay: int = 500, MaxLogicSteps: int = 8):
+        self.clock = clock
+        self.TargetFPS = TargetFPS
+        self.IdleFPS = IdleFPS
+        # Milliseconds without input before a static screen goes idle
+        self.IdleDelay = IdleDelay
+        self.LogicStep = 1000 / LogicFPS
+        # Upper bound of catch-up steps after a long frame (e.g. loading a level)
+        self.MaxLogicSteps = MaxLogicSteps
+
+        self.Accumulator = 0.0
+        self.LastTicks = pygame.time.get_ticks()
+        self.LastInput = self.LastTicks
+        self.FrameTime = 0
+        self.is_idle = False
+
+    # Events of this frame. While idle, waits for the next event, but never longer than one idle frame.
+    def Events(self) -> list:
+        if self.is_idle:
+            event = pygame.event.wait(int(1000 / self.IdleFPS))
+            events = pygame.event.get()
+            if event.type != pygame.NOEVENT:
+                events.insert(0, event)
+        else:
+            events = pygame.event.get()
+
+        now = pygame.time.get_ticks()
+        if events:
+            self.LastInput = now
+        self.FrameTime = now - self.LastTicks
+        self.LastTicks = now
+        self.Accumulator = min(self.Accumulator + self.FrameTime, self.LogicStep * self.MaxLogicSteps)
+        return events
+
+    # Number of fixed logic steps due this frame
+    def LogicSteps(self) -> int:
+        steps = int(self.Accumulator // self.LogicStep)
+        self.Accumulator -= steps * self.LogicStep
+        return steps
+
+    # Static: the current screen only changes on input
+    def EndFrame(self, Static: bool):
+        self.is_idle = Static and pygame.time.get_ticks() - self.LastInput >= self.IdleDelay
+        if not self.is_idle:
+            self.clock.tick(self.TargetFPS)
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+import pygame
+
+
+# Rendered text surfaces shared by the HUD, the Game Over screen and the leaderboard
+class TextCache:
+    def __init__(self, MaxEntries: int = 512):
+        self.MaxEntries = MaxEntries
+        # (font, text, color) -> surface
+        self.Surfaces = OrderedDict()
+        self.Hits = 0
+        self.Renders = 0
+
+    def Render(self, font: pygame.font.Font, text: str, color="White") -> pygame.Surface:
+        key = (font, text, str(color))
+        surface = self.Surfaces.get(key)
+        if surface is not None:
+            self.Hits += 1
+            self.Surfaces.move_to_end(key)
+            return surface
+        self.Renders += 1
+        surface = font.render(text, True, color)
+        self.Surfaces[key] = surface
+        if len(self.Surfaces) > self.MaxEntries:
+            self.Surfaces.popitem(last=False)
+        return surface
+
+    # Blits text made of prerendered single characters, centered at Center. Meant for counters: every digit is
+    # rendered once and a new value costs a few blits instead of a font render.
+    def BlitGlyphs(self, screen: pygame.Surface, font: pygame.font.Font, text: str, Center: tuple, color="White"):
+        glyphs = [self.Render(font, char, color) for char in text]
+        x = Center[0] - sum(glyph.get_width() for glyph in glyphs) / 2
+        for glyph in glyphs:
+            screen.blit(glyph, glyph.get_rect(midleft=(x, Center[1])))
+            x += glyph.get_width()
+
+    def Stats(self) -> dict:
+        return {"hits": self.Hits, "renders": self.Renders, "cached": len(self.Surfaces)}
+
+
+# A text label on a button background, looks like MainMenu.MainMenuButton but only renders text when it changes
+class HUDLabel:
+    def __init__(self, screen: pygame.Surface, Cache: TextCache, Font: pygame.font.Font, ButtonImage: pygame.Surface,
+                 Pos: tuple, Color="White"):
+        self.screen = screen
+        self.Cache = Cache
+        self.Font = Font
+        self.ButtonImage = ButtonImage
+        self.ButtonPos = Pos
+        self.Color = Color
+        self.Text = None
+        self.TextSurface = None
+
+    def display(self, text: str):
+        self.screen.blit(self.ButtonImage, self.ButtonImage.get_rect(center=self.ButtonPos))
+        if text != self.Text:
+            self.Text = text
+            self.TextSurface = self.Cache.Render(self.Font, text, self.Color)
+        self.screen.blit(self.TextSurface, self.TextSurface.get_rect(center=self.ButtonPos))
+
+    # Prefix and suffix are cached as whole strings, the number is drawn from digit glyphs
+    def display_counter(self, prefix: str, value: int, suffix: str = ""):
+        self.screen.blit(self.ButtonImage, self.ButtonImage.get_rect(center=self.ButtonPos))
+        head = self.Cache.Render(self.Font, prefix, self.Color)
+        tail = self.Cache.Render(self.Font, suffix, self.Color)
+        digits = str(value)
+        digits_width = sum(self.Cache.Render(self.Font, digit, self.Color).get_width() for digit in digits)
+        x = self.ButtonPos[0] - (head.get_width() + digits_width + tail.get_width()) / 2
+        self.screen.blit(head, head.get_rect(midleft=(x, self.ButtonPos[1])))
+        x += head.get_width()
+        self.Cache.BlitGlyphs(self.screen, self.Font, digits, (x + digits_width / 2, self.ButtonPos[1]), self.Color)
+        self.screen.blit(tail, tail.get_rect(midleft=(x + digits_width, self.ButtonPos[1])))
@@ -0,0 +1,28 @@
+import pygame
+
+
+# Mouse clicks of the current frame, edge-triggered, with cooldowns measured from pygame.time.get_ticks()
+class InputManager:
+    def __init__(self):
+        self.Now = pygame.time.get_ticks()
+        self.Clicks = []
+        # button -> tick until which it ignores clicks
+        self.CooldownUntil = {}
+
+    def Update(self, events):
+        self.Now = pygame.time.get_ticks()
+        self.Clicks = [event.pos for event in events if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1]
+
+    # True once per press inside the button. A click is used up by the first button that takes it, so it can't fall
+    # through to a button of the next screen, and the button itself ignores clicks for the next Cooldown ms.
+    def Clicked(self, Button, Cooldown: int = 0) -> bool:
+        if self.Now < self.CooldownUntil.get(Button, 0):
+            return False
+        for pos in self.Clicks:
+            if Button.ButtonRect.collidepoint(pos):
+                if Button.ButtonSound:
+                    Button.ButtonSound.play()
+                self.Clicks = []
+                self.CooldownUntil[Button] = self.Now + Cooldown
+                return True
+        return False
@@ -0,0 +1,147 @@
+# Modules/Leaderboard.py (färdigsorterad topplista per nivå, underhålls av AuthDB.record_score)
+import os, pickle
+from bisect import bisect_left, insort
+from typing import List, Optional, Tuple
+from . import AtomicFile
+
+
+class LevelBoard:
+    """ Bästa tid per användare för en nivå.
+    - best:  user_id -> (bästa tid, id på användarens första resultat på nivån)
+    - order: sorterad lista av (bästa tid, första resultat-id, user_id); lika tider hamnar i den ordning
+             spelarna först klarade nivån, precis som när top_times räknades fram ur alla resultat"""
+
+    def __init__(self, order=()):
+        self.order = sorted(order)
+        self.best = {user_id: (time_sec, first_id) for time_sec, first_id, user_id in self.order}
+
+    def add(self, user_id: int, time_sec: int, score_id: int) -> bool:
+        """Tar med ett nytt resultat. True om topplistan ändrades (ny spelare eller ny bästa tid)."""
+        old = self.best.get(user_id)
+        if old is None:
+            key = (time_sec, score_id, user_id)
+        elif time_sec < old[0]:
+            del self.order[bisect_left(self.order, (old[0], old[1], user_id))]
+            key = (time_sec, old[1], user_id)
+        else:
+            return False
+        self.best[user_id] = key[:2]
+        insort(self.order, key)
+        return True
+
+    def renumber(self, user_id: int, first_id: int):
+        """Byter id:t på spelarens första resultat (ett preliminärt id, se Leaderboards.add_pending)."""
+        time_sec, old_id = self.best[user_id]
+        del self.order[bisect_left(self.order, (time_sec, old_id, user_id))]
+        self.best[user_id] = (time_sec, first_id)
+        insort(self.order, (time_sec, first_id, user_id))
+
+    def top(self, limit: int) -> List[Tuple[int, int]]:
+        return [(user_id, time_sec) for time_sec, _, user_id in self.order[:limit]]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Placering (1 = snabbast) eller None om spelaren inte klarat nivån."""
+        best = self.best.get(user_id)
+        if best is None:
+            return None
+        return bisect_left(self.order, (best[0], best[1], user_id)) + 1
+
+    def around(self, user_id: int, radius: int) -> List[Tuple[int, int, int]]:
+        """[(placering, user_id, bästa tid)] för spelaren och upp till radius spelare före och efter."""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(0, rank - 1 - radius)
+        return [(start + i + 1, uid, time_sec)
+                for i, (time_sec, _, uid) in enumerate(self.order[start:rank + radius])]
+
+
+class Leaderboards:
+    """ Alla nivåers topplistor, sparade i en egen fil bredvid databasen.
+    - last_score_id: id på senaste resultatet som räknats in; ligger databasen före (t.ex. efter en krasch
+                     eller om en annan spelinstans sparat) läses bara de nyare resultaten in
+    - version:       ökar varje gång någon topplista ändras (ScoresDB ritar om när den ändrats)
+    - provisional:   (nivå, user_id) -> preliminärt id för spelare vars första resultat på nivån är köat
+                     men inte skrivet än (se add_pending)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.levels = {}
+        self.last_score_id = 0
+        self.version = 0
+        self.provisional = {}
+        self.dirty = False
+
+    def level(self, level: int) -> LevelBoard:
+        board = self.levels.get(level)
+        if board is None:
+            board = self.levels[level] = LevelBoard()
+        return board
+
+    def record(self, score: dict):
+        if score["id"] <= self.last_score_id:
+            return
+        self.last_score_id = score["id"]
+        self.dirty = True
+        board = self.level(score["level"])
+        if self.provisional.pop((score["level"], score["user_id"]), None) is not None:
+            # Spelarens första resultat på nivån, som add_pending räknat in med preliminärt id
+            board.renumber(score["user_id"], score["id"])
+        if board.add(score["user_id"], score["time_sec"], score["id"]):
+            self.version += 1
+
+    def add_pending(self, score: dict, provisional_id: int):
+        """ Tar med ett köat resultat som inte fått sitt id än (pickle), så att det syns direkt.
+        last_score_id rörs inte: record/catch_up räknar in det riktiga resultatet när det skrivits, och är
+        spelaren ny på nivån byts det preliminära id:t ut mot det riktiga då."""
+        board = self.level(score["level"])
+        new = score["user_id"] not in board.best
+        if board.add(score["user_id"], score["time_sec"], provisional_id):
+            self.version += 1
+            if new:
+                self.provisional[(score["level"], score["user_id"])] = provisional_id
+
+    def reset(self):
+        self.levels = {}
+        self.provisional = {}
+        self.last_score_id = 0
+        self.version += 1
+        self.dirty = True
+
+    def catch_up(self, last_score_id: int, iter_scores):
+        """Synkar mot databasen. iter_scores(after_id) ska ge resultaten med id > after_id i id-ordning."""
+        if last_score_id == self.last_score_id:
+            return
+        if last_score_id < self.last_score_id:
+            # Databasen har färre resultat än topplistan (bytt eller återställd fil): bygg om från början
+            self.reset()
+        for score in iter_scores(self.last_score_id):
+            self.record(score)
+        self.version += 1
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            self.levels = {level: LevelBoard(order) for level, order in data["levels"].items()}
+            self.last_score_id = data["last_score_id"]
+        except (OSError, EOFError, pickle.UnpicklingError, KeyError, TypeError, ValueError):
+            # Trasig fil: börja om, catch_up bygger upp listan igen från resultaten
+            self.levels = {}
+            self.last_score_id = 0
+        self.provisional = {}
+        self.version += 1
+        self.dirty = False
+
+    def save(self):
+        # Med köade resultat i listan väntar vi: de får inte hamna i filen om de aldrig blir skrivna
+        if not self.dirty or self.provisional:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Atomiskt, så att en krasch eller en annan spelinstans aldrig lämnar en halvskriven fil
+        AtomicFile.write_bytes(self.path, pickle.dumps({
+            "last_score_id": self.last_score_id,
+            "levels": {level: board.order for level, board in self.levels.items()}}))
+        self.dirty = False
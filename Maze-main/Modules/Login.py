@@ -1,9 +1,21 @@
 # Modules/Login.py
 import pygame
+from concurrent.futures import ThreadPoolExecutor
 from .InputBox import InputBox
 from . import AuthDB
 from . import MainMenu  # för MainMenuButton-knapparna
 
+# Postas när inloggningstråden är klar, så att en vilande spelloop (FrameScheduler) vaknar direkt
+AUTH_DONE = pygame.event.custom_type()
+
+
+def _wake_event_loop(_future):
+    try:
+        pygame.event.post(pygame.event.Event(AUTH_DONE))
+    except pygame.error:
+        pass  # spelet har redan stängts
+
+
 class Login:
     def __init__(self, screen, buttons_font_inactive, buttons_font_active, button_image, title_font, mm_button_sound):
         self.screen = screen
@@ -15,6 +27,10 @@ class Login:
         self.user_id = None
         self.button_sound = mm_button_sound
 
+        # Lösenordshashningen (AuthDB) tar tid, så den körs i en egen tråd medan skärmen visar "Loggar in..."
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Login")
+        self.pending = None         # (mode, användarnamn, Future) medan en kontroll pågår
+
         self.buttons_font_inactive = buttons_font_inactive
         self.buttons_font_active = buttons_font_active
         self.button_image = button_image
@@ -53,9 +69,32 @@ class Login:
             return True
         return False
 
+    def _start(self, mode, u, function, *args):
+        self.message = "Loggar in..." if mode == "login" else "Skapar konto..."
+        future = self.worker.submit(function, *args)
+        future.add_done_callback(_wake_event_loop)
+        self.pending = (mode, u, future)
+
+    def _poll(self):
+        """Tar hand om svaret från inloggningstråden när det finns."""
+        mode, u, future = self.pending
+        if not future.done():
+            return
+        self.pending = None
+        try:
+            ok, data = future.result()
+        except Exception as e:
+            ok, data = False, f"Fel: {e}"
+        if mode == "login":
+            self._login_done(u, ok, data)
+        else:
+            self._signup_done(ok, data)
+
     def _submit_login(self):
         u, p = self.ib_user.value(), self.ib_pass.value()
-        ok, data = AuthDB.verify_user(u, p)
+        self._start("login", u, AuthDB.verify_user, u, p)
+
+    def _login_done(self, u, ok, data):
         if ok:
             self.result = "login_ok"
             self.username = u
@@ -76,7 +115,9 @@ class Login:
         if p != p2:
             self.message = "Lösenorden matchar inte."
             return
-        ok, data = AuthDB.create_user(u, p)
+        self._start("signup", u, AuthDB.create_user, u, p)
+
+    def _signup_done(self, ok, data):
         if ok:
             self.message = "Konto skapat! Logga in nu."
             self.mode = "login"
@@ -97,6 +138,9 @@ class Login:
 
 
     def update(self, events, mouse_pos):
+        if self.pending is not None:
+            self._poll()
+
         submitted_by_enter = False
         for e in events:
             if self.ib_user.handle_event(e): 
@@ -151,8 +195,8 @@ class Login:
                     self.button_image, self.btn_toggle.ButtonPos, self.button_sound
                 )
 
-        # Submit (edge på knappen eller via Enter i input)
-        if (submit_edge and self._cooldown_ok()) or submitted_by_enter:
+        # Submit (edge på knappen eller via Enter i input); inte medan en kontroll redan pågår
+        if self.pending is None and ((submit_edge and self._cooldown_ok()) or submitted_by_enter):
             if self.mode == "login":
                 self._submit_login()
             else:
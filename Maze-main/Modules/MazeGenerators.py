@@ -0,0 +1,285 @@
+import random
+from itertools import count, permutations
+
+import numpy as np
+
+
+# Maze generation algorithms. Every generator takes (width, height, rnd), where rnd is the maze's random.Random,
+# and returns the grid PlayGame.Maze uses: a (height + 1) x (width + 1) uint8 array, 0 = path, 1 = wall.
+# The cells are the odd coordinates (x < width, y < height), everything between two cells is a wall unless the
+# algorithm carves a passage through it, and the last row and column are always wall. All of them carve a perfect
+# maze: exactly one path between any two cells, so the player always starts at (width - 1, height - 1) and can
+# always reach home at (1, 1). The same rnd state always gives the same maze.
+
+# Every order of the four carving directions; picking one at random is the same as shuffling them
+CARVE_ORDERS = list(permutations([(0, 1), (1, 0), (0, -1), (-1, 0)]))
+
+
+# The grid as a flat bytearray of walls, row by row with stride width + 1; plain bytearray indexing is much faster
+# than numpy's per element, and the finished bytearray becomes the grid without a copy
+def new_cells(width, height):
+    return bytearray(b"\x01") * ((width + 1) * (height + 1))
+
+
+def as_grid(cells, width, height):
+    return np.frombuffer(cells, dtype=np.uint8).reshape(height + 1, width + 1)
+
+
+# Opens every cell (odd x, odd y); for the algorithms that only need to decide which walls between cells to remove
+def open_all_cells(cells, width, height):
+    stride, columns = width + 1, width // 2
+    for y in range(1, height, 2):
+        cells[y * stride + 1:y * stride + 2 * columns:2] = bytes(columns)
+
+
+# Flat grid index of every cell, numbered row by row (cell c is column c % columns, row c // columns)
+def cell_positions(width, height):
+    stride, columns = width + 1, width // 2
+    return [y * stride + x for y in range(1, 2 * (height // 2), 2) for x in range(1, 2 * columns, 2)]
+
+
+# Depth-first backtracker with an explicit stack instead of recursion, so any size works without touching the
+# recursion limit. Each stack entry is a cell and the rest of its random direction order. Long winding corridors
+# and few dead ends.
+def carve(cells, x, y, width, height, rnd):
+    stride = width + 1
+    choose, orders = rnd.randrange, CARVE_ORDERS
+    stack = [(x, y, iter(orders[choose(24)]))]
+    while stack:
+        x, y, directions = stack[-1]
+        for dx, dy in directions:
+            nx, ny = x + dx * 2, y + dy * 2
+            if 0 <= nx < width and 0 <= ny < height and cells[ny * stride + nx] == 1:
+                cells[ny * stride + nx] = 0
+                cells[(ny - dy) * stride + nx - dx] = 0
+                stack.append((nx, ny, iter(orders[choose(24)])))
+                break
+        else:
+            stack.pop()
+
+
+def backtracker(width, height, rnd):
+    cells = new_cells(width, height)
+    cells[width + 2] = 0  # (1, 1)
+    carve(cells, 1, 1, width, height, rnd)
+    return as_grid(cells, width, height)
+
+
+# Kruskal: every wall between two cells in random order, removed when the cells are not connected yet
+# (union-find with path halving). Short dead ends everywhere, no long corridors.
+def kruskal(width, height, rnd):
+    cells = new_cells(width, height)
+    stride, columns, rows = width + 1, width // 2, height // 2
+    position = cell_positions(width, height)
+    # Wall e is between cell e >> 1 and its right (e even) or lower (e odd) neighbour
+    walls = [c * 2 for c in range(columns * rows) if c % columns != columns - 1]
+    walls += [c * 2 + 1 for c in range(columns * (rows - 1))]
+    rnd.shuffle(walls)
+    parent = list(range(columns * rows))
+    joins = columns * rows - 1
+    for e in walls:
+        if joins <= 0:
+            break
+        a = e >> 1
+        b = a + columns if e & 1 else a + 1
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a != b:
+            parent[a] = b
+            joins -= 1
+            cell = position[e >> 1]
+            cells[cell + stride if e & 1 else cell + 1] = 0
+    open_all_cells(cells, width, height)
+    return as_grid(cells, width, height)
+
+
+# Randomized Prim: grows one tree from a random cell, always through a random wall on its border.
+# Many short dead ends that branch out from the start.
+def prim(width, height, rnd):
+    cells = new_cells(width, height)
+    stride, columns, rows = width + 1, width // 2, height // 2
+    if not columns or not rows:
+        return as_grid(cells, width, height)
+    x, y = 2 * rnd.randrange(columns) + 1, 2 * rnd.randrange(rows) + 1
+    cells[y * stride + x] = 0
+    # Border walls as (x, y, dx, dy): the cell (x, y) outside the tree, reached from the tree by moving (dx, dy)
+    frontier = []
+    choose = rnd.randrange
+    while True:
+        for dx, dy in ((0, 1), (1, 0), (0, -1), (-1, 0)):
+            nx, ny = x + dx * 2, y + dy * 2
+            if 0 <= nx < width and 0 <= ny < height and cells[ny * stride + nx] == 1:
+                frontier.append((nx, ny, dx, dy))
+        # A random wall from the border; swapped to the end so removing it is O(1)
+        while frontier:
+            i = choose(len(frontier))
+            frontier[i], frontier[-1] = frontier[-1], frontier[i]
+            x, y, dx, dy = frontier.pop()
+            if cells[y * stride + x] == 1:
+                cells[y * stride + x] = 0
+                cells[(y - dy) * stride + x - dx] = 0
+                break
+        else:
+            break
+    return as_grid(cells, width, height)
+
+
+# Wilson: loop-erased random walks from every cell not yet in the maze until they hit it. A uniformly random
+# spanning tree, so no bias in any direction; slow at the start, while the maze is small.
+def wilson(width, height, rnd):
+    cells = new_cells(width, height)
+    stride, columns, rows = width + 1, width // 2, height // 2
+    total = columns * rows
+    if not total:
+        return as_grid(cells, width, height)
+    position = cell_positions(width, height)
+    in_maze = bytearray(total)
+    in_maze[rnd.randrange(total)] = 1
+    # Direction the walk last left each cell: overwriting it when the walk comes back is the loop erasure
+    exit_step = [0] * total
+    steps = (1, -1, columns, -columns)
+    walls = (1, -1, stride, -stride)
+    choose = rnd.randrange
+    for start in range(total):
+        c = start
+        while not in_maze[c]:
+            while True:
+                d = choose(4)
+                if d == 0 and c % columns != columns - 1 or d == 1 and c % columns != 0 \
+                        or d == 2 and c + columns < total or d == 3 and c >= columns:
+                    break
+            exit_step[c] = d
+            c += steps[d]
+        c = start
+        while not in_maze[c]:
+            in_maze[c] = 1
+            d = exit_step[c]
+            cells[position[c] + walls[d]] = 0
+            c += steps[d]
+    open_all_cells(cells, width, height)
+    return as_grid(cells, width, height)
+
+
+# Eller: one row of cells at a time, keeping only which set (connected part so far) each cell of the current row
+# belongs to. Yields the grid rows y = 0 .. height as bytes, so memory is O(width) however tall the maze is.
+# With height None the maze never ends: the rows keep coming and every row stays connected to the ones below it.
+def eller_rows(width, height, rnd):
+    stride, columns = width + 1, width // 2
+    rows = None if height is None else height // 2
+    wall = b"\x01" * stride
+    yield wall
+    bit = rnd.getrandbits
+    # sets[i]: set of cell i in the current row (0 = none yet), members: set -> columns in the current row
+    sets = [0] * columns
+    members = {}
+    label = 0
+    for j in count() if rows is None else range(rows):
+        last = rows is not None and j == rows - 1
+        for i in range(columns):
+            if not sets[i]:
+                label += 1
+                sets[i] = label
+                members[label] = [i]
+        row = bytearray(wall)
+        row[1:2 * columns:2] = bytes(columns)
+        # Join neighbours from different sets at random (all of them on the last row, which closes the maze)
+        for i in range(columns - 1):
+            a, b = sets[i], sets[i + 1]
+            if a != b and (last or bit(1)):
+                row[2 * i + 2] = 0
+                if len(members[a]) < len(members[b]):
+                    a, b = b, a
+                for k in members[b]:
+                    sets[k] = a
+                members[a] += members.pop(b)
+        yield bytes(row)
+        if last:
+            break
+        # Every set continues down through at least one of its cells, the others at random
+        below = bytearray(wall)
+        next_sets = [0] * columns
+        next_members = {}
+        for s, cols in members.items():
+            down = [i for i in cols if bit(1)] or [cols[rnd.randrange(len(cols))]]
+            for i in down:
+                below[2 * i + 1] = 0
+                next_sets[i] = s
+            next_members[s] = down
+        sets, members = next_sets, next_members
+        yield bytes(below)
+    # Wall rows below the last cell row (none above it when the maze is too small for any cells)
+    for _ in range(max(2 * rows, 1), height + 1):
+        yield wall
+
+
+def eller(width, height, rnd):
+    cells = bytearray().join(eller_rows(width, height, rnd))
+    return as_grid(cells, width, height)
+
+
+# NumPy random generator for the vectorized algorithms, seeded from the maze's rnd
+def numpy_rng(rnd):
+    return np.random.default_rng(rnd.getrandbits(64))
+
+
+# Sidewinder, vectorized: the top row is one corridor; on every other row each cell either continues its run east
+# or ends it, and every run opens north through one random cell of the run. Easy to go up, hard to go down.
+def sidewinder(width, height, rnd):
+    grid = np.ones((height + 1, width + 1), dtype=np.uint8)
+    columns, rows = width // 2, height // 2
+    if not columns or not rows:
+        return grid
+    rng = numpy_rng(rnd)
+    grid[1:2 * rows:2, 1:2 * columns:2] = 0
+    east = rng.random((rows, columns)) < 0.5
+    east[0] = True
+    east[:, -1] = False
+    grid[1:2 * rows:2, 2:2 * columns:2][east[:, :-1]] = 0
+    # Runs of rows 1.. in one flat array; the last column always ends a run, so no run spans two rows
+    ends = np.flatnonzero(~east[1:])
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    north = starts + (rng.random(len(ends)) * (ends - starts + 1)).astype(np.intp)
+    row, column = np.divmod(north, columns)
+    grid[2 * row + 2, 2 * column + 1] = 0
+    return grid
+
+
+# Binary tree, vectorized: every cell opens north or west at random (the top row only west, the left column only
+# north), so every cell has a path towards home at (1, 1). The fastest, with two long corridors along the edges.
+def binary_tree(width, height, rnd):
+    grid = np.ones((height + 1, width + 1), dtype=np.uint8)
+    columns, rows = width // 2, height // 2
+    if not columns or not rows:
+        return grid
+    rng = numpy_rng(rnd)
+    grid[1:2 * rows:2, 1:2 * columns:2] = 0
+    north = rng.random((rows, columns)) < 0.5
+    north[:, 0] = True
+    north[0] = False
+    west = ~north
+    west[0, 0] = False
+    grid[0:2 * rows - 1:2, 1:2 * columns:2][north] = 0
+    grid[1:2 * rows:2, 0:2 * columns - 1:2][west] = 0
+    return grid
+
+
+GENERATORS = {
+    "backtracker": backtracker,
+    "kruskal": kruskal,
+    "prim": prim,
+    "wilson": wilson,
+    "eller": eller,
+    "sidewinder": sidewinder,
+    "binary_tree": binary_tree,
+}
+
+
+def generate(name, width, height, rnd=None):
+    generator = GENERATORS.get(name)
+    if generator is None:
+        raise ValueError(f"Unknown maze generator: {name} (one of {', '.join(GENERATORS)})")
+    return generator(width, height, random.Random() if rnd is None else rnd)
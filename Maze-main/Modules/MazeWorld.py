@@ -0,0 +1,170 @@
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from . import MazeGenerators
+
+
+# Maze World
+class MazeWorld:
+    """
+    A maze without edges, made of Chunk x Chunk squares. Chunk (cx, cy) covers cx * Chunk <= x < (cx + 1) * Chunk and
+    cy * Chunk <= y < (cy + 1) * Chunk, in the same format as Maze.grid (odd coordinates are cells, 0 = path), and
+    depends only on (seed, cx, cy): a perfect maze from MazeGenerators, plus one opening in its west wall and one in
+    its north wall. Every chunk is therefore connected to all four neighbours and the whole world to the start.
+    prefetch() queues the chunks around the screen for a background thread, so they are ready before they scroll into
+    view; the MaxChunks most recently used are kept, evicted chunks are generated again (identically) when needed.
+    """
+    def __init__(self, Seed=None, Chunk: int = 32, Algorithm: str = "backtracker", MaxChunks: int = 256,
+                 Margin: int = 1):
+        if Chunk < 4 or Chunk % 2:
+            raise ValueError(f"Chunk must be even and at least 4, not {Chunk}")
+        if Algorithm not in MazeGenerators.GENERATORS:
+            raise ValueError(f"Unknown maze generator: {Algorithm} (one of {', '.join(MazeGenerators.GENERATORS)})")
+        self.seed = random.randrange(1 << 32) if Seed is None else Seed
+        self.chunk = Chunk
+        self.algorithm = Algorithm
+        self.max_chunks = MaxChunks
+        # Chunks generated in advance beyond the ones on the screen, in every direction
+        self.margin = Margin
+
+        self.lock = threading.Lock()
+        # (cx, cy) -> read-only Chunk x Chunk uint8 array, least recently used first
+        self.chunks = OrderedDict()
+        # Chunks waiting for the background thread, nearest to the screen first
+        self.queue = deque()
+        self.thread = None
+
+        self.generated = 0
+        # Chunks that were not ready when the game needed them, generated on the game thread
+        self.misses = 0
+        self.evicted = 0
+        self.max_generate_ms = 0.0
+
+    # The player starts next to (0, 0) and there is no home: the world just goes on
+    @property
+    def start(self):
+        return 1, 1
+
+    @property
+    def home(self):
+        return None
+
+    def make_chunk(self, cx, cy):
+        rnd = random.Random(f"{self.seed}:{cx}:{cy}")
+        half = self.chunk // 2
+        west, north = 2 * rnd.randrange(half) + 1, 2 * rnd.randrange(half) + 1
+        # The generator's wall padding (last row and column) is the next chunk's west and north wall
+        grid = MazeGenerators.generate(self.algorithm, self.chunk, self.chunk, rnd)[:self.chunk, :self.chunk].copy()
+        grid[west, 0] = 0
+        grid[0, north] = 0
+        grid.flags.writeable = False
+        return grid
+
+    def timed_make_chunk(self, key):
+        start = time.perf_counter()
+        grid = self.make_chunk(*key)
+        elapsed = (time.perf_counter() - start) * 1000
+        with self.lock:
+            self.generated += 1
+            self.max_generate_ms = max(self.max_generate_ms, elapsed)
+        return grid
+
+    # Adds a chunk (unless another thread got there first) and evicts the least recently used; call with the lock
+    def store(self, key, grid):
+        old = self.chunks.get(key)
+        if old is not None:
+            self.chunks.move_to_end(key)
+            return old
+        self.chunks[key] = grid
+        while len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+            self.evicted += 1
+        return grid
+
+    def chunk_at(self, cx, cy):
+        key = (cx, cy)
+        with self.lock:
+            grid = self.chunks.get(key)
+            if grid is not None:
+                self.chunks.move_to_end(key)
+                return grid
+        grid = self.timed_make_chunk(key)
+        with self.lock:
+            self.misses += 1
+            return self.store(key, grid)
+
+    # Called every frame with the visible cells (Viewport.VisibleCells): marks the chunks on and around the screen as
+    # used and queues the missing ones, nearest first. The queue is replaced every time, so chunks the player has
+    # already turned away from are not generated.
+    def prefetch(self, x0, y0, x1, y1):
+        c = self.chunk
+        cx0, cy0 = x0 // c - self.margin, y0 // c - self.margin
+        cx1, cy1 = (x1 - 1) // c + self.margin, (y1 - 1) // c + self.margin
+        middle = ((cx0 + cx1) / 2, (cy0 + cy1) / 2)
+        keys = sorted(((cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)),
+                      key=lambda k: abs(k[0] - middle[0]) + abs(k[1] - middle[1]), reverse=True)
+        with self.lock:
+            missing = deque()
+            # Farthest first, so the nearest chunks end up most recently used
+            for key in keys:
+                if key in self.chunks:
+                    self.chunks.move_to_end(key)
+                else:
+                    missing.appendleft(key)
+            self.queue = missing
+            if missing and self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="MazeWorld", daemon=True)
+                self.thread.start()
+
+    # Background thread: generates the queued chunks and ends when the queue is empty (prefetch starts a new one)
+    def _run(self):
+        while True:
+            with self.lock:
+                while self.queue and self.queue[0] in self.chunks:
+                    self.queue.popleft()
+                if not self.queue:
+                    self.thread = None
+                    return
+                key = self.queue.popleft()
+            grid = self.timed_make_chunk(key)
+            with self.lock:
+                self.store(key, grid)
+
+    # Same as Maze.is_path, read from the chunk the cell is in
+    def is_path(self, x, y):
+        c = self.chunk
+        return self.chunk_at(x // c, y // c)[y % c, x % c] == 0
+
+    # Same as Maze.open_cells, put together from the chunks the window overlaps
+    def open_cells(self, X, Y, Width, Height):
+        cells = np.empty((Height, Width), dtype=bool)
+        c = self.chunk
+        for cy in range(Y // c, (Y + Height - 1) // c + 1):
+            y0, y1 = max(Y, cy * c), min(Y + Height, (cy + 1) * c)
+            for cx in range(X // c, (X + Width - 1) // c + 1):
+                x0, x1 = max(X, cx * c), min(X + Width, (cx + 1) * c)
+                grid = self.chunk_at(cx, cy)
+                cells[y0 - Y:y1 - Y, x0 - X:x1 - X] = grid[y0 - cy * c:y1 - cy * c, x0 - cx * c:x1 - cx * c] == 0
+        return cells
+
+    # Waits for the background thread (tests and benchmarks)
+    def wait(self, timeout: float = 5.0):
+        with self.lock:
+            thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "chunks": len(self.chunks),
+                "queued": len(self.queue),
+                "generated": self.generated,
+                "misses": self.misses,
+                "evicted": self.evicted,
+                "max_generate_ms": round(self.max_generate_ms, 3),
+            }
@@ -1,11 +1,30 @@
 import random
 import heapq
-import time
-from sys import setrecursionlimit
+import math
+import struct
+import tempfile
+from collections import OrderedDict
 
+import numpy as np
 import pygame
 
-setrecursionlimit(100000)  # To ensure that generate_maze_main function doesn't give an error
+from . import MazeGenerators
+from .MazeWorld import MazeWorld
+from .TileCache import TileCache
+
+
+# Difficulty level -> (width, height, generator in MazeGenerators.GENERATORS).
+# A height of None makes the level endless, e.g. (40, None, "eller"): rows are generated as the player goes down.
+# An endless level can give a depth as well, (40, None, "eller", 200): home is then in the right-hand corner of that row.
+# No width and height, e.g. (None, None, "backtracker"), is a world without edges, generated in chunks around the player
+MAZE_LEVELS = {
+    1: (20, 20, "backtracker"),
+    2: (30, 30, "backtracker"),
+    3: (40, 40, "backtracker"),
+    4: (40, None, "eller", 200),
+}
+# Maze.to_bytes header: width, height, seed
+MAZE_HEADER = struct.Struct(">IIQ")
 
 
 # For solving A*
@@ -15,40 +34,82 @@ def heuristic(x, y):
 
 
 class Maze:
-    def __init__(self, Width, Height):
+    # The maze is a contiguous uint8 grid (self.grid) of (height + 1) x (width + 1) cells: 0 = path, 1 = wall.
+    # The extra last row and column are walls, like the padding the list version used to append.
+    # Seed: the same seed, size and algorithm always give the same maze; None picks a random seed (kept in self.seed)
+    # Algorithm: name of the generator in MazeGenerators.GENERATORS
+    def __init__(self, Width, Height, Seed=None, Algorithm="backtracker"):
         self.width = Width
         self.height = Height
-        self.maze = [[1 for _ in range(self.width)] for _ in range(self.height)]
+        self.algorithm = Algorithm
+        self.seed = random.randrange(1 << 32) if Seed is None else Seed
+        self.random = random.Random(self.seed)
+        self.grid = None
         self.generate_maze()
 
-    def carve_maze(self, x, y, maze):
-        ValidDirections = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-        random.shuffle(ValidDirections)
-        for dx, dy in ValidDirections:
-            nx, ny = x + dx * 2, y + dy * 2
-            if 0 <= nx < self.width and 0 <= ny < self.height and maze[ny][nx] == 1:
-                maze[ny][nx] = 0
-                maze[ny - dy][nx - dx] = 0
-                self.carve_maze(nx, ny, maze)
-
-    def generate_maze_main(self):
-        self.maze[1][1] = 0
-        self.carve_maze(1, 1, self.maze)
+    # Read-only view of the grid for callers that index it like the old list of lists: maze[y][x], len(maze),
+    # iterating over the rows
+    @property
+    def maze(self):
+        view = self.grid.view()
+        view.flags.writeable = False
+        return view
+
+    # The player starts in the bottom right corner and is home in the top left one
+    @property
+    def start(self):
+        return self.width - 1, self.height - 1
+
+    @property
+    def home(self):
+        return 1, 1
+
+    # True if (x, y) is inside the maze and not a wall
+    def is_path(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.grid[y, x] == 0
+
+    # Boolean array of Height x Width cells starting at (X, Y), True where there is a path; outside the maze is wall
+    def open_cells(self, X, Y, Width, Height):
+        cells = np.zeros((Height, Width), dtype=bool)
+        x0, y0 = max(X, 0), max(Y, 0)
+        x1, y1 = min(X + Width, self.width), min(Y + Height, self.height)
+        if x0 < x1 and y0 < y1:
+            cells[y0 - Y:y1 - Y, x0 - X:x1 - X] = self.grid[y0:y1, x0:x1] == 0
+        return cells
 
     def generate_maze(self):
-        self.generate_maze_main()
-        for i in self.maze:
-            i += [1]
-        self.maze += [[1] * (self.width + 1)]
+        self.grid = MazeGenerators.generate(self.algorithm, self.width, self.height, self.random)
 
     def print_maze(self, is_raw: bool = False):
         if not is_raw:
-            for row in self.maze:
-                print("".join("X " if cell else "  " for cell in row))
+            for row in np.where(self.grid != 0, "X ", "  "):
+                print("".join(row))
         else:
-            for row in self.maze:
+            for row in self.grid.tolist():
                 print(row)
 
+    # Serialization: width, height and seed, then the grid as one bit per cell (1 = path)
+    def to_bytes(self) -> bytes:
+        header = MAZE_HEADER.pack(self.width, self.height, self.seed % (1 << 64))
+        return header + np.packbits(self.grid == 0).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        Width, Height, Seed = MAZE_HEADER.unpack_from(data)
+        maze = cls.__new__(cls)
+        maze.width, maze.height, maze.seed = Width, Height, Seed
+        # The grid is stored, not how it was generated
+        maze.algorithm = None
+        maze.random = random.Random(Seed)
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=MAZE_HEADER.size),
+                             count=(Width + 1) * (Height + 1))
+        maze.grid = (1 - bits).reshape(Height + 1, Width + 1)
+        return maze
+
+    # Iterative depth-first search (explicit stack, same order and path as the old recursive one).
+    # Works on flat indices into a copy of the grid: the wall column at x = width also stops moves past the left
+    # and right edges, so only moves above the first row need a bounds check. Visited cells are marked with 2
+    # in the copy, the maze itself is never changed.
     def solve_maze_dfs(self, X: int = -1, Y: int = -1, path: str = ""):
         if X == -1:
             x = self.width - 1
@@ -61,22 +122,42 @@ class Maze:
         if x == 1 and y == 1:  # Found the exit
             return path
 
-        # Mark as visited
-        self.maze[y][x] = 2
-        for dx, dy, Direction in [(0, -1, 'U'), (1, 0, 'L'), (0, 1, 'D'), (-1, 0, 'R')]:  # Directions to move
-            nx, ny = x + dx, y + dy
-            if self.width > nx >= 0 == self.maze[ny][nx] and 0 <= ny < self.height:
-                result = self.solve_maze_dfs(nx, ny, path + Direction)
-                if result:  # Path found
-                    return result
-        # Backtrack
-        self.maze[y][x] = 0
+        stride = self.width + 1
+        goal = stride + 1
+        cells = bytearray(self.grid.tobytes())
+        Directions = [(-stride, 'U'), (1, 'L'), (stride, 'D'), (-1, 'R')]  # Directions to move
+        # Mark as visited; every stack entry is a cell and the index of the next direction to try
+        cells[y * stride + x] = 2
+        stack = [[y * stride + x, 0]]
+        moves = [path]
+        while stack:
+            top = stack[-1]
+            cell, i = top
+            if i == len(Directions):
+                # Backtrack
+                cells[cell] = 0
+                stack.pop()
+                moves.pop()
+                continue
+            top[1] += 1
+            step, Direction = Directions[i]
+            Next = cell + step
+            if Next >= 0 and cells[Next] == 0:
+                if Next == goal:  # Found the exit
+                    return "".join(moves) + Direction
+                cells[Next] = 2
+                stack.append([Next, 0])
+                moves.append(Direction)
         return ""
 
+    # A* on flat indices into the grid (see solve_maze_dfs), with the Manhattan distance to (1, 1) as heuristic
     def solve_maze_a_star(self):
-        start = (self.width - 1, self.height - 1)
-        goal = (1, 1)
-        frontier = [(0 + heuristic(*start), start)]  # Priority queue
+        stride = self.width + 1
+        start = (self.height - 1) * stride + self.width - 1
+        goal = stride + 1
+        # The grid as one flat list: a single vectorized conversion, after that plain list lookups
+        cells = self.grid.ravel().tolist()
+        frontier = [(heuristic(self.width - 1, self.height - 1), start)]  # Priority queue
         came_from = {start: None}
         cost_so_far = {start: 0}
 
@@ -86,33 +167,113 @@ class Maze:
             if current == goal:
                 break
 
-            for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
-                Next = (current[0] + dx, current[1] + dy)
-                if self.width > Next[0] >= 0 == self.maze[Next[1]][Next[0]] and 0 <= Next[1] < self.height:
+            for step in (-stride, 1, stride, -1):
+                Next = current + step
+                if Next >= 0 and cells[Next] == 0:
                     new_cost = cost_so_far[current] + 1
                     if Next not in cost_so_far or new_cost < cost_so_far[Next]:
                         cost_so_far[Next] = new_cost
-                        priority = new_cost + heuristic(*Next)
-                        heapq.heappush(frontier, (priority, Next))
+                        y, x = divmod(Next, stride)
+                        heapq.heappush(frontier, (new_cost + heuristic(x, y), Next))
                         came_from[Next] = current
 
-        # Reconstruct path
+        # Reconstruct path, from home back to the start
+        moves = {1: "R", -1: "L", stride: "D", -stride: "U"}
         current = goal
-        path = ""
+        path = []
         while current != start:
             prev = came_from[current]
-            if prev:
-                if current[0] - prev[0] == 1:
-                    path = "R" + path
-                elif current[0] - prev[0] == -1:
-                    path = "L" + path
-                elif current[1] - prev[1] == 1:
-                    path = "D" + path
-                elif current[1] - prev[1] == -1:
-                    path = "U" + path
+            path.append(moves[current - prev])
             current = prev
-
-        return path
+        return "".join(reversed(path))
+
+
+# Endless maze, Width cells wide, that goes on downwards forever (Eller's algorithm, MazeGenerators.eller_rows).
+# Rows are generated only when is_path or open_cells first reaches them, i.e. as the player goes down. The newest
+# rows (Window to 2 * Window of them) are kept in memory in the same format as Maze.grid rows; older ones are
+# spilled to SpillPath (a temporary file by default) one bit per cell and read back if the player returns, so memory
+# stays flat however deep the player goes.
+class StreamingMaze:
+    def __init__(self, Width, Seed=None, Algorithm="eller", Window=256, SpillPath=None, Depth=None):
+        if Algorithm != "eller":
+            raise ValueError(f"Only eller can generate an endless maze, not {Algorithm}")
+        self.width = Width
+        self.depth = Depth
+        self.algorithm = Algorithm
+        self.seed = random.randrange(1 << 32) if Seed is None else Seed
+        self.random = random.Random(self.seed)
+        self.window = Window
+        self.rows = []  # The rows in memory: y = self.first .. self.generated - 1
+        self.first = 0
+        self.generated = 0
+        self.stream = MazeGenerators.eller_rows(Width, None, self.random)
+        self.row_bytes = (Width + 8) // 8  # One spilled row: width + 1 bits
+        self.spill = tempfile.TemporaryFile() if SpillPath is None else open(SpillPath, "w+b")
+
+    # The player starts in the top left corner. Without a Depth there is no home to reach; with one, home is in the
+    # bottom right corner of the first Depth rows, like Maze.start. The maze goes on below it either way
+    @property
+    def start(self):
+        return 1, 1
+
+    @property
+    def home(self):
+        if self.depth is None:
+            return None
+        return self.width - 1, self.depth - 1
+
+    # Generates rows until row y exists
+    def ensure(self, y):
+        while self.generated <= y:
+            self.rows.append(next(self.stream))
+            self.generated += 1
+            if len(self.rows) >= 2 * self.window:
+                self.spill_rows(self.window)
+
+    # Moves the oldest Count rows in memory to the end of the spill file
+    def spill_rows(self, Count):
+        old = np.frombuffer(b"".join(self.rows[:Count]), dtype=np.uint8).reshape(Count, self.width + 1)
+        self.spill.seek(0, 2)
+        self.spill.write(np.packbits(old, axis=1).tobytes())
+        del self.rows[:Count]
+        self.first += Count
+
+    # Rows y0 .. y1 - 1 (0 <= y0 <= y1) as a (y1 - y0) x (width + 1) uint8 array, like a slice of Maze.grid
+    def grid_rows(self, y0, y1):
+        self.ensure(y1 - 1)
+        parts = []
+        if y0 < self.first:
+            spilled = min(y1, self.first) - y0
+            self.spill.seek(y0 * self.row_bytes)
+            packed = np.frombuffer(self.spill.read(spilled * self.row_bytes), dtype=np.uint8)
+            parts.append(np.unpackbits(packed.reshape(spilled, self.row_bytes), axis=1, count=self.width + 1))
+        if y1 > self.first:
+            kept = b"".join(self.rows[max(y0 - self.first, 0):y1 - self.first])
+            parts.append(np.frombuffer(kept, dtype=np.uint8).reshape(-1, self.width + 1))
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.ones((0, self.width + 1), dtype=np.uint8)
+
+    # Same as Maze.is_path; rows in memory are read straight from their bytes
+    def is_path(self, x, y):
+        if not (0 <= x < self.width and y >= 0):
+            return False
+        self.ensure(y)
+        if y >= self.first:
+            return self.rows[y - self.first][x] == 0
+        return self.grid_rows(y, y + 1)[0, x] == 0
+
+    # Same as Maze.open_cells: everything above the first row or outside the columns is wall
+    def open_cells(self, X, Y, Width, Height):
+        cells = np.zeros((Height, Width), dtype=bool)
+        x0, y0 = max(X, 0), max(Y, 0)
+        x1, y1 = min(X + Width, self.width), Y + Height
+        if x0 < x1 and y0 < y1:
+            cells[y0 - Y:, x0 - X:x1 - X] = self.grid_rows(y0, y1)[:, x0:x1] == 0
+        return cells
+
+    def close(self):
+        self.spill.close()
 
 
 # Player's Class
@@ -128,6 +289,18 @@ class Player:
         self.direction = 'down'
         self.is_pressed = False
 
+        # Scaled frames of every direction, rebuilt only when the player size changes
+        self.SheetWidth = None
+        self.Sheet = {}
+        self.SheetHalf = 0
+
+    def BuildSheet(self, PlayerWidth):
+        size = int(PlayerWidth * 8 / 10)
+        self.Sheet = {direction: [pygame.transform.scale(frame, (size, size)) for frame in frames]
+                      for direction, frames in self.image.items()}
+        self.SheetHalf = size // 2
+        self.SheetWidth = PlayerWidth
+
     def animate(self, keys, TimePassed, PlayerWidth, center):
         if keys[pygame.K_UP] or keys[pygame.K_w]:
             self.direction = 'up'
@@ -143,24 +316,133 @@ class Player:
             self.is_pressed = True
         else:
             self.is_pressed = False
-        rect = [pygame.transform.scale(self.image[self.direction][i],
-                                       (int(PlayerWidth * 8 / 10), int(PlayerWidth * 8 / 10))).get_rect(center=center)
-                for i in range(4)]
-
-        if self.is_pressed:
-            frame_index = int((int(TimePassed) % 400) / 100)
-            self.screen.blit(pygame.transform.scale(self.image[self.direction][frame_index],
-                                                    (int(PlayerWidth * 8 / 10), int(PlayerWidth * 8 / 10))),
-                             rect[frame_index])
-        else:
-            self.screen.blit(pygame.transform.scale(self.image[self.direction][0],
-                                                    (int(PlayerWidth * 8 / 10), int(PlayerWidth * 8 / 10))), rect[0])
+
+        if self.SheetWidth != PlayerWidth:
+            self.BuildSheet(PlayerWidth)
+
+        frame_index = int((int(TimePassed) % 400) / 100) if self.is_pressed else 0
+        self.screen.blit(self.Sheet[self.direction][frame_index],
+                         (int(center[0]) - self.SheetHalf, int(center[1]) - self.SheetHalf))
+
+
+# Camera of the Maze: which cells are visible around the player
+class Viewport:
+    def __init__(self, screen: pygame.Surface, MazeVisibility: int):
+        self.screen = screen
+        self.MazeVisibility = MazeVisibility
+        self.HalfRows = (self.MazeVisibility / 2) + 1
+        self.HalfColumns = (int(self.MazeVisibility * self.screen.get_width() / self.screen.get_height()) / 2) + 1
+
+    # Returns (x0, y0, x1, y1): the cells x0 <= x < x1 and y0 <= y < y1 are on the screen
+    def VisibleCells(self, Center: tuple) -> tuple:
+        return (math.ceil(Center[0] - self.HalfColumns), math.ceil(Center[1] - self.HalfRows),
+                math.floor(Center[0] + self.HalfColumns) + 1, math.floor(Center[1] + self.HalfRows) + 1)
+
+
+# Prerendered blocks of ChunkCells x ChunkCells maze cells, kept in an LRU cache bounded by MaxBytes.
+# Chunks within Ahead cells of the screen are baked in advance, one per frame, so that scrolling into a new row or
+# column of chunks does not bake several in the same frame.
+class MazeChunks:
+    def __init__(self, Tiles: TileCache, ChunkCells: int = 16, MaxBytes: int = 64 * 1024 * 1024, Ahead: int = 4):
+        self.Tiles = Tiles
+        self.ChunkCells = ChunkCells
+        self.MaxBytes = MaxBytes
+        self.Ahead = Ahead
+        self.Maze = None
+        # (theme, CellWidth, chunk x, chunk y) -> surface
+        self.Chunks = OrderedDict()
+        self.Bytes = 0
+        self.Baked = 0
+        self.Evicted = 0
+
+    def Clear(self):
+        self.Chunks.clear()
+        self.Bytes = 0
+
+    # Every maze gets its own chunks
+    def SetMaze(self, MazeGame):
+        if MazeGame is not self.Maze:
+            self.Maze = MazeGame
+            self.Clear()
+
+    def Chunk(self, theme, CellWidth, cx, cy, Markers):
+        key = (theme, CellWidth, cx, cy)
+        surface = self.Chunks.get(key)
+        if surface is not None:
+            self.Chunks.move_to_end(key)
+            return surface
+        surface = self.Bake(theme, CellWidth, cx, cy, Markers)
+        self.Chunks[key] = surface
+        self.Bytes += surface.get_pitch() * surface.get_height()
+        # Least recently used chunks go first, but the one just baked always stays
+        while self.Bytes > self.MaxBytes and len(self.Chunks) > 1:
+            _, old = self.Chunks.popitem(last=False)
+            self.Bytes -= old.get_pitch() * old.get_height()
+            self.Evicted += 1
+        return surface
+
+    def Bake(self, theme, CellWidth, cx, cy, Markers):
+        surface = pygame.Surface((self.ChunkCells * CellWidth, self.ChunkCells * CellWidth)).convert()
+        surface.fill("Black")
+        path_image = self.Tiles.Tile(theme, "Path", CellWidth)
+        wall_image = self.Tiles.Tile(theme, "Wall", CellWidth)
+        x0, y0 = cx * self.ChunkCells, cy * self.ChunkCells
+        # Which cells of the chunk are paths, read from the grid in one go
+        Open = self.Maze.open_cells(x0, y0, self.ChunkCells, self.ChunkCells).tolist()
+        surface.blits([(path_image if is_open else wall_image, (i * CellWidth, j * CellWidth))
+                       for j, row in enumerate(Open) for i, is_open in enumerate(row)], doreturn=False)
+        for (x, y), marker in Markers.items():
+            if x0 <= x < x0 + self.ChunkCells and y0 <= y < y0 + self.ChunkCells:
+                surface.blit(self.Tiles.Tile(theme, marker, CellWidth), ((x - x0) * CellWidth, (y - y0) * CellWidth))
+        self.Baked += 1
+        return surface
+
+    # (cx, cy) of the chunks overlapping the cells x0 <= x < x1, y0 <= y < y1
+    def ChunkRange(self, x0, y0, x1, y1):
+        return [(cx, cy) for cy in range(y0 // self.ChunkCells, (y1 - 1) // self.ChunkCells + 1)
+                for cx in range(x0 // self.ChunkCells, (x1 - 1) // self.ChunkCells + 1)]
+
+    # Blits the chunks overlapping the visible cells; Origin is the screen position of the center of cell (0, 0)
+    def Draw(self, screen: pygame.Surface, VisibleCells: tuple, Origin: tuple, theme, CellWidth: int, Markers: dict):
+        for cx, cy in self.ChunkRange(*VisibleCells):
+            chunk = self.Chunk(theme, CellWidth, cx, cy, Markers)
+            screen.blit(chunk, (math.floor(Origin[0] + cx * self.ChunkCells * CellWidth) - CellWidth // 2,
+                                math.floor(Origin[1] + cy * self.ChunkCells * CellWidth) - CellWidth // 2))
+        self.BakeAhead(VisibleCells, theme, CellWidth, Markers)
+
+    # Bakes the missing chunk within Ahead cells of the screen that is nearest to its middle, if there is room for it
+    # without evicting a chunk that is on the screen or ahead of it (which would only be baked again next frame)
+    def BakeAhead(self, VisibleCells: tuple, theme, CellWidth: int, Markers: dict):
+        x0, y0, x1, y1 = VisibleCells
+        Wanted = self.ChunkRange(x0 - self.Ahead, y0 - self.Ahead, x1 + self.Ahead, y1 + self.Ahead)
+        Missing = []
+        Kept = 0
+        for cx, cy in Wanted:
+            key = (theme, CellWidth, cx, cy)
+            surface = self.Chunks.get(key)
+            if surface is None:
+                Missing.append((cx, cy))
+            else:
+                self.Chunks.move_to_end(key)
+                Kept += surface.get_pitch() * surface.get_height()
+        if not Missing:
+            return
+        Size = (self.ChunkCells * CellWidth) ** 2 * 4
+        if self.MaxBytes - Kept < Size:
+            return
+        Middle = ((x0 + x1) / 2 / self.ChunkCells - 0.5, (y0 + y1) / 2 / self.ChunkCells - 0.5)
+        cx, cy = min(Missing, key=lambda c: (c[0] - Middle[0]) ** 2 + (c[1] - Middle[1]) ** 2)
+        self.Chunk(theme, CellWidth, cx, cy, Markers)
+
+    def Stats(self) -> dict:
+        return {"chunks": len(self.Chunks), "bytes": self.Bytes, "baked": self.Baked, "evicted": self.Evicted}
 
 
 # GamePlay
 class GamePlay:
     def __init__(self, screen: pygame.Surface, PlayerName: str, PlayerImagesPath: str, MazeImagesPath: str,
-                 PathAddress: str, GameOverImgAddress: str, MazeCellVisibility: int = 10):
+                 PathAddress: str, GameOverImgAddress: str, MazeCellVisibility: int = 10,
+                 ChunkCacheBytes: int = 64 * 1024 * 1024, MazeLevels: dict = None):
         self.screen = screen
         self.PlayerName = PlayerName
         self.Player = Player(self.screen, PlayerImagesPath)
@@ -173,115 +455,159 @@ class GamePlay:
         self.GameOverScreen = False
 
         self.Level = 0
+        self.MazeLevels = MAZE_LEVELS if MazeLevels is None else MazeLevels
         self.MazeGame = None
         self.GameStartTime = 0
         self.pathAddress = PathAddress
 
         self.PlayerCellCoordinates = (1, 1)
+        # Cells per second while a direction key is held
+        self.MoveSpeed = 20
+        # A move to the neighbouring MoveTarget is MoveProgress (0 to 1) of the way there;
+        # PlayerPosition is the interpolated position the camera and the sprite follow
+        self.MoveTarget = None
+        self.MoveProgress = 0.0
+        self.PlayerPosition = self.PlayerCellCoordinates
+        # Game time advanced in fixed logic steps (ms); the stopwatch runs on it too
+        self.LogicTime = 0
+        # The player rests at home for GameOverDelay ms before the Game Over screen
+        self.GameOverDelay = 500
+        self.GameOverAt = None
         self.XShift = self.screen.get_width() / 10
         self.BackgroundType = 0
         self.TotalBackgroundTypes = 5
         self.MazeVisibility = MazeCellVisibility
         self.MazeImagesPath = MazeImagesPath
         self.CellWidth = int(self.screen.get_height() / self.MazeVisibility)
+        self.Tiles = TileCache(self.MazeImagesPath, self.TotalBackgroundTypes)
+        self.Camera = Viewport(self.screen, self.MazeVisibility)
+        self.Chunks = MazeChunks(self.Tiles, MaxBytes=ChunkCacheBytes)
         self.MainCellCoordinates = ((self.XShift + self.screen.get_height()) / 2, self.screen.get_height() / 2)
         GO_Image = pygame.image.load(GameOverImgAddress)
         self.GameOverImage = pygame.transform.scale(GO_Image, (GO_Image.get_width() / 2, GO_Image.get_height() / 2)).convert_alpha()
 
+    # Drops the current maze so SetMazeLevel makes a new one; StreamingMaze also closes its spill file
+    def CloseMaze(self):
+        if hasattr(self.MazeGame, "close"):
+            self.MazeGame.close()
+        self.MazeGame = None
+
     # To be called only once.
     def SetMazeLevel(self):
         if self.MazeGame is None:
-            if self.Level == 1:
-                self.MazeGame = Maze(20, 20)
-            elif self.Level == 2:
-                self.MazeGame = Maze(30, 30)
-            elif self.Level == 3:
-                self.MazeGame = Maze(40, 40)
-            self.PlayerCellCoordinates = (self.MazeGame.width - 1, self.MazeGame.height - 1)
+            Level = self.MazeLevels[self.Level]
+            Width, Height, Algorithm = Level[:3]
+            if Width is None:
+                # Endless in every direction, generated in chunks around the player
+                self.MazeGame = MazeWorld(Algorithm=Algorithm)
+            elif Height is None:
+                # Endless downwards, with home at the level's depth if it has one
+                self.MazeGame = StreamingMaze(Width, Algorithm=Algorithm, Depth=Level[3] if len(Level) > 3 else None)
+            else:
+                self.MazeGame = Maze(Width, Height, Algorithm=Algorithm)
+            self.PlayerCellCoordinates = self.MazeGame.start
             self.GameStartTime = pygame.time.get_ticks()
+            self.LogicTime = self.GameStartTime
+            self.GameOverAt = None
+            self.MoveTarget = None
+            self.MoveProgress = 0.0
+            self.PlayerPosition = self.PlayerCellCoordinates
         # print(self.MazeGame.solve_maze_a_star())
         with open(self.pathAddress, 'w') as file:
-            file.write(self.MazeGame.solve_maze_a_star())
-
-    def GamePlay(self, keys, TimePassed):
+            if isinstance(self.MazeGame, Maze):
+                file.write(self.MazeGame.solve_maze_a_star())
+
+    # LogicSteps fixed steps of LogicStep ms each, then one frame is drawn
+    def GamePlay(self, keys, TimePassed, LogicSteps: int = 1, LogicStep: float = 1000 / 120):
+        for _ in range(LogicSteps):
+            self.Update(keys, LogicStep)
+            if not self.GameScreen:
+                break
 
         self.DisplayMazeBackground()
         self.Player.animate(keys, TimePassed, self.CellWidth, self.MainCellCoordinates)
-        self.PlayerCellCoordinatesMover(keys)
 
-        # Timer
-        self.StopwatchValue = pygame.time.get_ticks() - self.GameStartTime
+    def Update(self, keys, StepTime):
+        self.LogicTime += StepTime
+        if self.GameOverAt is None:
+            self.PlayerCellCoordinatesMover(keys, StepTime)
+
+            # Timer: game time, so a run takes as long on slow hardware as on fast, where logic steps get dropped
+            self.StopwatchValue = self.LogicTime - self.GameStartTime
 
         # GameOver
         self.GameOver()
 
     def DisplayMazeBackground(self):
-        for x in range(-(self.MazeVisibility + 1), self.MazeGame.width + 1 + (self.MazeVisibility + 1)):
-            for y in range(-(self.MazeVisibility + 1), self.MazeGame.height + 1 + (self.MazeVisibility + 1)):
-                self.DisplayCell(x, y)
-
-    def DisplayCell(self, x, y):
-        Dest = (self.MainCellCoordinates[0] + (x - self.PlayerCellCoordinates[0]) * self.CellWidth,
-                self.MainCellCoordinates[1] + (y - self.PlayerCellCoordinates[1]) * self.CellWidth)
-
-        if abs(y - self.PlayerCellCoordinates[1]) <= (self.MazeVisibility / 2) + 1 and abs(
-                x - self.PlayerCellCoordinates[0]) <= (
-                (int(self.MazeVisibility * self.screen.get_width() / self.screen.get_height())) / 2) + 1:
-            if 0 <= x < self.MazeGame.width and 0 <= y < self.MazeGame.height:
-                path_image = pygame.transform.scale(
-                    pygame.image.load(f"{self.MazeImagesPath}/{self.BackgroundType}/Path.png"),
-                    (self.CellWidth, self.CellWidth)).convert_alpha()
-                wall_image = pygame.transform.scale(
-                    pygame.image.load(f"{self.MazeImagesPath}/{self.BackgroundType}/Wall.png"),
-                    (self.CellWidth, self.CellWidth)).convert_alpha()
-
-                if self.MazeGame.maze[y][x] == 0:
-                    self.screen.blit(path_image, path_image.get_rect(center=Dest))
-                else:
-                    self.screen.blit(wall_image, wall_image.get_rect(center=Dest))
-            else:
-                wall_image = pygame.transform.scale(
-                    pygame.image.load(f"{self.MazeImagesPath}/{self.BackgroundType}/Wall.png"),
-                    (self.CellWidth, self.CellWidth)).convert_alpha()
-
-                self.screen.blit(wall_image, wall_image.get_rect(center=Dest))
-
-            if (x, y) == (1, 1):
-                home_image = pygame.transform.scale(pygame.image.load(f"{self.MazeImagesPath}/Home.png"),
-                                                    (self.CellWidth, self.CellWidth)).convert_alpha()
-                self.screen.blit(home_image, home_image.get_rect(center=Dest))
-            elif (x, y) == (self.MazeGame.width - 1, self.MazeGame.height - 1):
-                start_image = pygame.transform.scale(pygame.image.load(f"{self.MazeImagesPath}/Start.png"),
-                                                     (self.CellWidth, self.CellWidth)).convert_alpha()
-                self.screen.blit(start_image, start_image.get_rect(center=Dest))
-
-    def PlayerCellCoordinatesMover(self, keys):
-        isActive = False
-        TrialNewCoordinates = ()
+        self.Chunks.SetMaze(self.MazeGame)
+        VisibleCells = self.Camera.VisibleCells(self.PlayerPosition)
+        if isinstance(self.MazeGame, MazeWorld):
+            # Chunks around the screen are generated in the background before they scroll into view
+            self.MazeGame.prefetch(*VisibleCells)
+        Origin = (self.MainCellCoordinates[0] - self.PlayerPosition[0] * self.CellWidth,
+                  self.MainCellCoordinates[1] - self.PlayerPosition[1] * self.CellWidth)
+        self.Chunks.Draw(self.screen, VisibleCells, Origin, self.BackgroundType, self.CellWidth, self.MazeMarkers())
+
+    # Cells drawn with an extra tile on top
+    def MazeMarkers(self) -> dict:
+        Markers = {self.MazeGame.start: "Start"}
+        if self.MazeGame.home is not None:
+            Markers[self.MazeGame.home] = "Home"
+        return Markers
+
+    @staticmethod
+    def HeldDirection(keys):
         if keys[pygame.K_UP] or keys[pygame.K_w]:
-            TrialNewCoordinates = (self.PlayerCellCoordinates[0], self.PlayerCellCoordinates[1] - 1)
-            isActive = True
+            return 0, -1
         elif keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            TrialNewCoordinates = (self.PlayerCellCoordinates[0], self.PlayerCellCoordinates[1] + 1)
-            isActive = True
+            return 0, 1
         elif keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            TrialNewCoordinates = (self.PlayerCellCoordinates[0] - 1, self.PlayerCellCoordinates[1])
-            isActive = True
+            return -1, 0
         elif keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            TrialNewCoordinates = (self.PlayerCellCoordinates[0] + 1, self.PlayerCellCoordinates[1])
-            isActive = True
+            return 1, 0
+        return None
+
+    # Advances the player by StepTime ms of movement. Walls are only checked when a move starts, i.e. at cell
+    # boundaries; a started move always finishes, even if the key is released halfway.
+    def PlayerCellCoordinatesMover(self, keys, StepTime):
+        Distance = self.MoveSpeed * StepTime / 1000
+        while Distance > 0:
+            if self.MoveTarget is None:
+                direction = self.HeldDirection(keys)
+                if direction is None:
+                    break
+                TrialNewCoordinates = (self.PlayerCellCoordinates[0] + direction[0],
+                                       self.PlayerCellCoordinates[1] + direction[1])
+                if not self.MazeGame.is_path(*TrialNewCoordinates):
+                    break
+                self.MoveTarget = TrialNewCoordinates
+                self.MoveProgress = 0.0
+
+            self.MoveProgress += Distance
+            if self.MoveProgress < 1:
+                break
+            # Arrived: whatever is left of this step goes into the next move
+            Distance = self.MoveProgress - 1
+            self.PlayerCellCoordinates = self.MoveTarget
+            self.MoveTarget = None
+            self.MoveProgress = 0.0
+            if self.PlayerCellCoordinates == self.MazeGame.home:
+                break
 
-        if isActive:
-            if 0 <= TrialNewCoordinates[0] < self.MazeGame.width and 0 <= TrialNewCoordinates[1] < self.MazeGame.height:
-                if self.MazeGame.maze[TrialNewCoordinates[1]][TrialNewCoordinates[0]] == 0:
-                    self.PlayerCellCoordinates = TrialNewCoordinates
-                time.sleep(0.05)
+        if self.MoveTarget is None:
+            self.PlayerPosition = self.PlayerCellCoordinates
+        else:
+            self.PlayerPosition = (
+                self.PlayerCellCoordinates[0] + (self.MoveTarget[0] - self.PlayerCellCoordinates[0]) * self.MoveProgress,
+                self.PlayerCellCoordinates[1] + (self.MoveTarget[1] - self.PlayerCellCoordinates[1]) * self.MoveProgress)
 
     def GameOver(self):
-        if self.PlayerCellCoordinates == (1, 1):
-            time.sleep(0.5)
-            self.GameScreen = False
-            self.GameOverScreen = True
+        if self.PlayerCellCoordinates == self.MazeGame.home:
+            if self.GameOverAt is None:
+                self.GameOverAt = self.LogicTime + self.GameOverDelay
+            elif self.LogicTime >= self.GameOverAt:
+                self.GameScreen = False
+                self.GameOverScreen = True
 
     def GameOverScreenDisplay(self):
         # print(self.StopwatchValue)
@@ -290,3 +616,4 @@ class GamePlay:
 
     def ChangeBackground(self):
         self.BackgroundType = (self.BackgroundType + 1) % self.TotalBackgroundTypes
+        self.Tiles.Retain(self.BackgroundType, self.CellWidth)
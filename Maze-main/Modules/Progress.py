@@ -0,0 +1,55 @@
+# Modules/Progress.py
+from typing import Optional
+from . import AuthDB
+
+
+class ProgressService:
+    """ Inloggade spelarens progress i minnet, så att landskärmen inte läser databasen varje frame.
+    - done:      bitset, bit i = landet Countries.COUNTRIES[i] är klart
+    - unlocked:  förberäknat öppet/låst per land (samma regler som i game.py)"""
+
+    def __init__(self, countries):
+        self.countries = countries
+        self.index = {entry["country"]: i for i, entry in enumerate(countries)}
+        self.user_id: Optional[int] = None
+        self.done = 0
+        self.unlocked = [False] * len(countries)
+        self._recompute()
+
+    def load(self, user_id: Optional[int]):
+        """Läser in spelarens progress en gång (vid inloggning)."""
+        self.user_id = user_id
+        self.done = 0
+        if user_id is not None:
+            for country_id in AuthDB.get_progress(user_id):
+                if country_id in self.index:
+                    self.done |= 1 << self.index[country_id]
+        self._recompute()
+
+    def _unlock_rule(self, idx: int) -> bool:
+        # UNLOCK RULES: 1) bana 1 alltid öppen
+        #               2) denna bana redan klar
+        #               3) föregående bana klar → lås upp denna
+        return idx == 0 or self.is_done(idx) or self.is_done(idx - 1)
+
+    def _recompute(self):
+        self.unlocked = [self._unlock_rule(i) for i in range(len(self.countries))]
+
+    def is_done(self, idx: int) -> bool:
+        return bool(self.done >> idx & 1)
+
+    def is_unlocked(self, idx: int) -> bool:
+        return self.unlocked[idx]
+
+    def complete(self, country_id: str) -> bool:
+        """Sparar ett klarat land i DB och uppdaterar bara de två berörda länderna i minnet."""
+        if self.user_id is None:
+            return False
+        ok = AuthDB.add_country_progress(self.user_id, country_id)
+        idx = self.index.get(country_id)
+        if ok and idx is not None:
+            self.done |= 1 << idx
+            for i in (idx, idx + 1):
+                if i < len(self.countries):
+                    self.unlocked[i] = self._unlock_rule(i)
+        return ok
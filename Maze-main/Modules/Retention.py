@@ -0,0 +1,87 @@
+# Modules/Retention.py (vilka gamla resultat som kan rullas upp till dagsstatistik, används av AuthDB)
+import time
+from typing import Dict, List
+
+# Histogrammets gränser i sekunder: hink i räknar tider < BUCKET_EDGES[i] (och >= föregående gräns),
+# sista hinken allt från 600 s och uppåt
+BUCKET_EDGES = (15, 30, 45, 60, 90, 120, 180, 300, 600)
+
+
+def day_of(created_at: int) -> str:
+    """Dagen (UTC) ett resultat sparades, t.ex. "2024-05-17"."""
+    return time.strftime("%Y-%m-%d", time.gmtime(created_at))
+
+
+def bucket_of(time_sec: int) -> int:
+    for i, edge in enumerate(BUCKET_EDGES):
+        if time_sec < edge:
+            return i
+    return len(BUCKET_EDGES)
+
+
+def empty_rollup() -> dict:
+    return {"count": 0, "min": None, "sum": 0, "buckets": [0] * (len(BUCKET_EDGES) + 1)}
+
+
+def add(rollups: dict, score: dict):
+    """Räknar in ett resultat i rollups[(dag, nivå)]."""
+    key = (day_of(score["created_at"]), score["level"])
+    r = rollups.get(key)
+    if r is None:
+        r = rollups[key] = empty_rollup()
+    t = score["time_sec"]
+    r["count"] += 1
+    r["min"] = t if r["min"] is None else min(r["min"], t)
+    r["sum"] += t
+    r["buckets"][bucket_of(t)] += 1
+
+
+def merge(into: dict, other: dict) -> dict:
+    """Lägger ihop två rollups för samma dag och nivå (i into)."""
+    into["count"] += other["count"]
+    if other["min"] is not None:
+        into["min"] = other["min"] if into["min"] is None else min(into["min"], other["min"])
+    into["sum"] += other["sum"]
+    into["buckets"] = [a + b for a, b in zip(into["buckets"], other["buckets"])]
+    return into
+
+
+def plan(rows, keep_last: int) -> List[int]:
+    """ Id:n (äldst först) på resultat som kan rullas upp. Per användare och nivå sparas alltid:
+    - första resultatet:   avgör ordningen vid lika tid på topplistan (Leaderboard.LevelBoard)
+    - bästa resultatet:    snabbaste tiden, vid lika tid det äldsta
+    - de keep_last senaste
+    Topplistan blir alltså densamma som om alla resultat fanns kvar. Något som kan rullas upp en gång kan
+    alltid rullas upp sedan (nya resultat flyttar bara fönstret framåt eller ersätter bästa tiden), så det
+    gör inget om planen hunnit bli gammal när den används.
+    rows: lista av (id, user_id, nivå, tid) i id-ordning; gås igenom två gånger."""
+    groups = {}  # (user_id, nivå) -> [första id, bästa tid, bästa id, antal kvar att gå igenom]
+    for score_id, user_id, level, time_sec in rows:
+        g = groups.get((user_id, level))
+        if g is None:
+            groups[(user_id, level)] = [score_id, time_sec, score_id, 1]
+        else:
+            if time_sec < g[1]:
+                g[1], g[2] = time_sec, score_id
+            g[3] += 1
+    ids = []
+    for score_id, user_id, level, _ in rows:
+        g = groups[(user_id, level)]
+        g[3] -= 1  # nu: antal nyare resultat i gruppen
+        if g[3] >= keep_last and score_id != g[0] and score_id != g[2]:
+            ids.append(score_id)
+    return ids
+
+
+def daily_stats(rollups: Dict[str, dict], raw_scores, level: int) -> List[dict]:
+    """ Statistik per dag för en nivå: upprullade resultat (rollups: dag -> rollup) plus de som finns kvar.
+    [{"day", "count", "min", "mean", "buckets"}] sorterat på dag."""
+    days = {day: merge(empty_rollup(), r) for day, r in rollups.items()}
+    raw = {}
+    for s in raw_scores:
+        if s["level"] == level:
+            add(raw, s)
+    for (day, _), r in raw.items():
+        merge(days.setdefault(day, empty_rollup()), r)
+    return [{"day": day, "count": r["count"], "min": r["min"], "mean": r["sum"] / r["count"],
+             "buckets": r["buckets"]} for day, r in sorted(days.items()) if r["count"]]
@@ -1,13 +1,22 @@
 # Modules/ScoresDB.py
 import pygame
 from . import AuthDB
+from . import HUDText
 
 class HighScores:
-    def __init__(self, screen, _csv_path_unused, title_font):
+    def __init__(self, screen, _csv_path_unused, title_font, text_cache=None):
         self.screen = screen
         self.title_font = title_font
+        # delad cache för renderade texter (HUDText.TextCache), annars en egen
+        self.text_cache = text_cache if text_cache is not None else HUDText.TextCache()
         self.is_active = False
         self.isUpdated = False  # sätts i UpdateScore för "NEW HIGH SCORE"
+        self.HighScoreText = ""  # sätts i FinishRun, visas på Game Over-skärmen
+
+        # Färdigritade kolumner [(yta, rect)] och topplistans version när de byggdes
+        self.levels = [(1, "EASY (20x20)"), (2, "MEDIUM (40x40)"), (3, "DIFFICULT (60x60)"), (4, "ENDLESS (200 DEEP)")]
+        self.columns = []
+        self.version = None
 
         # mindre font för rader
         self.row_font = pygame.font.Font("media/fonts/ArialRoundedMTBold.ttf", 24)
@@ -25,35 +34,59 @@ class HighScores:
         best = rows[0][1] if rows else None
         self.isUpdated = (best is None) or (int(time_sec) < int(best))
 
-    def _draw_column(self, x_center: int, level: int, title: str):
-        # Rubrik
-        title_surf = self.label_font.render(title, True, "White")
-        self.screen.blit(title_surf, title_surf.get_rect(center=(x_center, 150)))
+    def FinishRun(self, user_id, level: int, time_sec: int):
+        """Körs en gång när en runda är klar: kollar rekord mot topplistan *innan* tiden sparas,
+        sparar tiden (om någon är inloggad) och bygger texten som Game Over-skärmen visar."""
+        self.UpdateScore(time_sec, level)
+        if user_id is not None:
+            try:
+                AuthDB.record_score(user_id, level, int(time_sec))
+            except Exception:
+                pass
+        if self.isUpdated:
+            self.HighScoreText = f"NEW HIGH SCORE : {int(time_sec)} SEC"
+        else:
+            self.HighScoreText = f"HIGH SCORE: {self.HighScore(level)} SEC"
+
+    def Open(self):
+        """Visar leaderboard-skärmen."""
+        self.is_active = True
 
-        # Top 10 från DB
+    def _build_column(self, level: int, title: str):
+        """Rubrik + topp 10 för en nivå, renderat en gång till en egen yta.
+        Returnerar (yta, rect runt x=0) så att kolumnen hamnar exakt där raderna ritades var för sig."""
         rows = AuthDB.top_times(level, limit=10)  # [(username, best), ...]
-        y = 190
-        rank = 1
-        for username, best in rows:
-            line = f"{rank}. {username} — {best} s"
+        lines = [f"{rank}. {username} — {best} s" for rank, (username, best) in enumerate(rows, start=1)]
+        if not lines:
+            lines = ["Inga tider ännu"]
+        title_surf = self.text_cache.Render(self.label_font, title, "White")
+        parts = [(title_surf, title_surf.get_rect(center=(0, 150)))]
+        for i, line in enumerate(lines):
             surf = self.row_font.render(line, True, "White")
-            rect = surf.get_rect(center=(x_center, y))
-            self.screen.blit(surf, rect)
-            y += 32
-            rank += 1
-        if not rows:
-            surf = self.row_font.render("Inga tider ännu", True, "White")
-            rect = surf.get_rect(center=(x_center, y))
-            self.screen.blit(surf, rect)
+            parts.append((surf, surf.get_rect(center=(0, 190 + 32 * i))))
+        box = parts[0][1].unionall([rect for _, rect in parts[1:]])
+        column = pygame.Surface(box.size, pygame.SRCALPHA)
+        for surf, rect in parts:
+            column.blit(surf, rect.move(-box.x, -box.y))
+        return column, box
+
+    def _refresh(self):
+        """Bygger om kolumnerna om topplistan ändrats sedan de byggdes (nytt resultat)."""
+        version = AuthDB.leaderboard_version()
+        if version != self.version:
+            self.version = version
+            self.columns = [self._build_column(level, title) for level, title in self.levels]
 
     def DisplayHighScores(self):
+        # Versionen kollas varje frame (billigt), så ett resultat som sparas medan skärmen visas kommer med direkt
+        self._refresh()
+
         # Stor titel
-        title = self.title_font.render("LEADERBOARD", True, "Yellow")
+        title = self.text_cache.Render(self.title_font, "LEADERBOARD", "Yellow")
         self.screen.blit(title, title.get_rect(center=(self.screen.get_width()/2, 80)))
 
-        # Tre kolumner: Easy / Medium / Difficult
+        # En kolumn per nivå: Easy / Medium / Difficult / Endless
         W = self.screen.get_width()
-        cols = [W//6, W//2, 5*W//6]
-        self._draw_column(cols[0], 1, "EASY (20x20)")
-        self._draw_column(cols[1], 2, "MEDIUM (40x40)")
-        self._draw_column(cols[2], 3, "DIFFICULT (60x60)")
+        cols = [(2*i + 1) * W // (2*len(self.columns)) for i in range(len(self.columns))]
+        for x_center, (column, box) in zip(cols, self.columns):
+            self.screen.blit(column, box.move(x_center, 0))
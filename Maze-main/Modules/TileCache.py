@@ -0,0 +1,59 @@
+import pygame
+
+
+# Tile Textures of the Maze
+class TileCache:
+    """
+    Decodes every theme under MazeImagesPath/<n>/ (and the shared Home/Start tiles) exactly once, and hands out
+    scaled, display-converted surfaces keyed by (theme, tile kind, CellWidth).
+    """
+    ThemeTiles = ("Path", "Wall")
+    SharedTiles = ("Home", "Start")
+
+    def __init__(self, MazeImagesPath: str, TotalThemes: int):
+        self.MazeImagesPath = MazeImagesPath
+        self.TotalThemes = TotalThemes
+
+        # (theme, kind) -> decoded surface, theme is None for the shared tiles
+        self.Sources = {}
+        # (theme, kind, CellWidth) -> scaled and converted surface
+        self.Scaled = {}
+
+        # Counters
+        self.Hits = 0
+        self.Misses = 0
+        self.FileLoads = 0
+
+        self.Preload()
+
+    def Preload(self):
+        for theme in range(self.TotalThemes):
+            for kind in self.ThemeTiles:
+                self.Sources[(theme, kind)] = self.LoadSource(f"{self.MazeImagesPath}/{theme}/{kind}.png")
+        for kind in self.SharedTiles:
+            self.Sources[(None, kind)] = self.LoadSource(f"{self.MazeImagesPath}/{kind}.png")
+
+    def LoadSource(self, path: str) -> pygame.Surface:
+        self.FileLoads += 1
+        return pygame.image.load(path).convert_alpha()
+
+    def Tile(self, theme, kind: str, CellWidth: int) -> pygame.Surface:
+        if kind in self.SharedTiles:
+            theme = None
+        key = (theme, kind, CellWidth)
+        surface = self.Scaled.get(key)
+        if surface is not None:
+            self.Hits += 1
+            return surface
+        self.Misses += 1
+        surface = pygame.transform.scale(self.Sources[(theme, kind)], (CellWidth, CellWidth)).convert_alpha()
+        self.Scaled[key] = surface
+        return surface
+
+    # Drops every scaled surface that doesn't belong to the given theme and cell size
+    def Retain(self, theme: int, CellWidth: int):
+        self.Scaled = {key: surface for key, surface in self.Scaled.items()
+                       if key[2] == CellWidth and key[0] in (theme, None)}
+
+    def Stats(self) -> dict:
+        return {"hits": self.Hits, "misses": self.Misses, "file_loads": self.FileLoads, "scaled": len(self.Scaled)}
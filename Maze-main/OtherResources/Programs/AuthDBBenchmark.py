@@ -0,0 +1,308 @@
+"""
+Scalability benchmark of the AuthDB API. For every backend and database size a database with USERS users and
+the given number of scores is synthesized in a temporary directory, then the public API is timed on it:
+    load          cold load of a fresh store (pickle: snapshot + journal, SQLite: connect + schema check)
+    open          AuthDB.init_db() on a cold start, including the leaderboard rebuild (no cache file)
+    verify_user   with a 1-iteration KDF, so the storage lookup is measured and not the password hash
+    record_score  with FLUSH_POLICY "background" (what the game thread pays) and "immediate" (durable)
+    top_times, has_access, get_progress
+    save          pickle: compaction to a new snapshot, SQLite: commit after a write
+    retain        one full AuthDB.retain() pass (rollup of old runs), last so it does not shrink the other cases
+The database is built in one process and measured in another, so the peak memory belongs to the measured
+operations only. Results are written as JSON
+(p50/p99/mean/max in ms, file sizes in bytes, peak memory in MB). With --baseline the run is compared against an
+earlier JSON file and the exit code is 1 if some p50/p99 got slower than --threshold times the baseline.
+Run from the Maze-main directory:
+    python OtherResources/Programs/AuthDBBenchmark.py [--sizes 1000 100000 1000000] [--out bench.json]
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import pickle
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.getcwd())
+
+from Modules import AtomicFile, AuthDB, AuthSQLite, Countries
+
+LEVELS = (1, 2, 3)
+PASSWORD = "benchmark"
+
+
+def percentile(sorted_values, p):
+    """Nearest rank."""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(samples_ns) -> dict:
+    values = sorted(ns / 1e6 for ns in samples_ns)
+    return {
+        "n": len(values),
+        "p50_ms": round(percentile(values, 50), 4),
+        "p99_ms": round(percentile(values, 99), 4),
+        "mean_ms": round(sum(values) / len(values), 4),
+        "max_ms": round(values[-1], 4),
+    }
+
+
+def timed(function, arguments) -> dict:
+    samples = []
+    for args in arguments:
+        start = time.perf_counter_ns()
+        function(*args)
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def synthesize(users: int, scores: int, seed: int) -> dict:
+    """AuthDB's pickle dict with the given number of users and scores (the same format as a snapshot)."""
+    rnd = random.Random(seed)
+    countries = [entry["country"] for entry in Countries.COUNTRIES]
+    kdf = AuthDB._current_kdf()
+    salt = bytes(16)
+    pw_hash = AuthDB._hash_password(PASSWORD, salt, kdf)
+    now = int(time.time())
+    db = AuthDB._default_db()
+    db["users"] = [{
+        "id": i,
+        "username": f"user{i:07d}",
+        "pw_salt": salt,
+        "pw_hash": pw_hash,
+        "kdf": kdf,
+        "created_at": now,
+        "progress": dict.fromkeys(countries[:rnd.randint(0, len(countries))], True),
+    } for i in range(1, users + 1)]
+    db["scores"] = [{
+        "id": i,
+        "user_id": rnd.randint(1, users),
+        "level": rnd.choice(LEVELS),
+        "time_sec": rnd.randint(5, 600),
+        "created_at": now,
+    } for i in range(1, scores + 1)]
+    db["counters"]["users"] = users
+    db["counters"]["scores"] = scores
+    return db
+
+
+def file_sizes(directory) -> dict:
+    return {name: os.path.getsize(os.path.join(directory, name)) for name in sorted(os.listdir(directory))}
+
+
+def use_directory(directory, backend) -> str:
+    AuthDB.DB_PATH = os.path.join(directory, "game.pickle")
+    AuthDB.SQLITE_PATH = os.path.join(directory, "game.sqlite")
+    AuthDB.KDF_ITERATIONS = 1
+    AuthDB.FLUSH_POLICY = "background"
+    # Retention is measured as its own step at the end, not in the background during the other cases
+    AuthDB.RETENTION_EVERY = 0
+    AuthDB.use_backend(backend)
+    return AuthDB.SQLITE_PATH if backend == "sqlite" else AuthDB.DB_PATH
+
+
+def build_database(directory, backend, users, scores, seed) -> float:
+    """Writes the synthesized database the way the backend stores it. Returns the time it took in seconds."""
+    path = use_directory(directory, backend)
+    start = time.perf_counter()
+    db = synthesize(users, scores, seed)
+    if backend == "sqlite":
+        store = AuthSQLite.SQLiteStore(path, threading.RLock())
+        store.init()
+        AuthSQLite.migrate_pickle(lambda: db, store)
+        store.close()
+    else:
+        AtomicFile.write_bytes(path, pickle.dumps(db))
+    return round(time.perf_counter() - start, 3)
+
+
+def measure(directory, backend, users, samples, seed) -> dict:
+    path = use_directory(directory, backend)
+    rnd = random.Random(seed + 1)
+    result = {}
+
+    def load():
+        if backend == "sqlite":
+            store = AuthSQLite.SQLiteStore(path, threading.RLock())
+            store.init()
+            store.last_score_id()
+            store.conn.close()
+        else:
+            AuthDB.PickleStore(path, threading.RLock()).load()
+
+    ops = {}
+    load_runs = max(3, samples // 200)
+    ops["load"] = timed(load, [()] * load_runs)
+    tracemalloc.start()
+    load()
+    result["load_peak_alloc_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+    tracemalloc.stop()
+    ops["open"] = timed(AuthDB.init_db, [()])
+
+    user_ids = [rnd.randint(1, users) for _ in range(samples)]
+    countries = [entry["country"] for entry in Countries.COUNTRIES]
+    ops["verify_user"] = timed(AuthDB.verify_user, [(f"user{uid:07d}", PASSWORD) for uid in user_ids])
+    ops["record_score"] = timed(AuthDB.record_score,
+                                [(uid, rnd.choice(LEVELS), rnd.randint(5, 600)) for uid in user_ids])
+    AuthDB.flush()
+    AuthDB.FLUSH_POLICY = "immediate"
+    durable = max(10, samples // 10)
+    ops["record_score_immediate"] = timed(AuthDB.record_score,
+                                          [(uid, rnd.choice(LEVELS), rnd.randint(5, 600)) for uid in user_ids[:durable]])
+    AuthDB.FLUSH_POLICY = "background"
+    ops["top_times"] = timed(AuthDB.top_times, [(rnd.choice(LEVELS), 10) for _ in user_ids])
+    ops["has_access"] = timed(AuthDB.has_access, [(uid, rnd.choice(countries)) for uid in user_ids])
+    ops["get_progress"] = timed(AuthDB.get_progress, [(uid,) for uid in user_ids])
+
+    with AuthDB._lock:
+        store = AuthDB._store()
+    if backend == "sqlite":
+        def save():
+            AuthDB.record_score(user_ids[0], LEVELS[0], 600)
+            store.flush()
+    else:
+        save = store.compact
+    ops["save"] = timed(save, [()] * load_runs)
+    AuthDB.flush()
+    result["file_bytes"] = file_sizes(directory)
+    result["file_bytes_total"] = sum(result["file_bytes"].values())
+
+    start = time.perf_counter_ns()
+    result["retained_scores"] = AuthDB.retain()
+    ops["retain"] = summarize([time.perf_counter_ns() - start])
+    if backend == "pickle":
+        store.compact()
+    AuthDB.shutdown()
+    # Closing the connection checkpoints the SQLite WAL file into the database
+    with AuthDB._lock:
+        store.close()
+        AuthDB._active = None
+    result["file_bytes_total_after_retain"] = sum(file_sizes(directory).values())
+
+    result["ops"] = ops
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def _worker(queue, function, *args):
+    try:
+        queue.put(("ok", function(*args)))
+    except BaseException as e:
+        queue.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def run_isolated(function, *args):
+    """Runs function in a fresh process (spawn), so the memory peak is not inherited from earlier steps."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_worker, args=(queue, function, *args))
+    process.start()
+    status, value = queue.get()
+    process.join()
+    if status != "ok":
+        raise RuntimeError(value)
+    return value
+
+
+def run_case(backend: str, users: int, scores: int, samples: int, seed: int) -> dict:
+    directory = tempfile.mkdtemp(prefix=f"authdb-bench-{backend}-")
+    try:
+        result = {"backend": backend, "users": users, "scores": scores}
+        result["synthesize_s"] = run_isolated(build_database, directory, backend, users, scores, seed)
+        result.update(run_isolated(measure, directory, backend, users, samples, seed))
+        return result
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def compare(results, baseline_path, threshold) -> list:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["backend"], r["scores"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get((result["backend"], result["scores"]))
+        if old is None:
+            continue
+        for op, stats in result["ops"].items():
+            before = old["ops"].get(op)
+            if before is None:
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                # Below 0.05 ms the noise is larger than any difference
+                if stats[key] > max(before[key], 0.05) * threshold:
+                    regressions.append(f"{result['backend']} {result['scores']} scores {op} {key}: "
+                                       f"{before[key]} -> {stats[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=("pickle", "sqlite"), default=["pickle", "sqlite"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 100_000, 1_000_000], help="number of scores")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--samples", type=int, default=1000, help="calls per operation")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON here instead of to stdout")
+    parser.add_argument("--baseline", help="earlier JSON output to compare against")
+    parser.add_argument("--threshold", type=float, default=1.5, help="slowdown factor counted as a regression")
+    args = parser.parse_args()
+
+    results = []
+    for backend in args.backends:
+        for scores in args.sizes:
+            print(f"{backend}: {args.users} users, {scores} scores ...", file=sys.stderr, flush=True)
+            result = run_case(backend, args.users, scores, args.samples, args.seed)
+            results.append(result)
+            ops = result["ops"]
+            print("  " + ", ".join(f"{op} {ops[op]['p50_ms']}/{ops[op]['p99_ms']} ms" for op in ops)
+                  + f", {result['file_bytes_total'] / 2 ** 20:.1f} MB on disk, {result['peak_rss_mb']} MB RSS",
+                  file=sys.stderr, flush=True)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlite": sqlite3.sqlite_version,
+            "users": args.users,
+            "samples": args.samples,
+            "seed": args.seed,
+            "kdf": [AuthDB.KDF_ALGORITHM, 1],
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
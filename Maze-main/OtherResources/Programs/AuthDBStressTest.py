@@ -0,0 +1,246 @@
+"""
+Stress test of AuthDB with several game instances sharing one data directory.
+N processes record scores and progress at the same time; afterwards every score must be there exactly once,
+ids must be unique, the indexes and the leaderboard must match the data. With --kill one extra process is
+killed (SIGKILL) while it writes, and the database must still load cleanly. Afterwards two single-process checks:
+every score and progress change must be readable right after it is made, before the writer thread has written it,
+and (pickle) a flush that fails halfway must leave the journal clean and lose nothing. Run from the Maze-main directory:
+    python OtherResources/Programs/AuthDBStressTest.py [--processes 8] [--scores 500] [--backend pickle] [--kill]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from Modules import AuthDB
+
+COUNTRIES = ["Sweden", "India", "USA", "Japan", "Brazil"]
+
+
+def setup(directory: str, backend: str, compact_bytes: int):
+    AuthDB.DB_PATH = os.path.join(directory, "game.pickle")
+    AuthDB.SQLITE_PATH = os.path.join(directory, "game.sqlite")
+    AuthDB.JOURNAL_COMPACT_BYTES = compact_bytes
+    # Keep the password hash cheap, this test is about the storage
+    AuthDB.KDF_ITERATIONS = 1_000
+    # Every score must stay a raw score so the counts can be checked
+    AuthDB.RETENTION_EVERY = 0
+    AuthDB.use_backend(backend)
+
+
+def worker(index: int, directory: str, backend: str, compact_bytes: int, scores: int, start):
+    setup(directory, backend, compact_bytes)
+    ok, data = AuthDB.create_user(f"stress{index}", "password")
+    if not ok:
+        raise SystemExit(f"worker {index}: {data}")
+    user_id = data["user_id"]
+    rnd = random.Random(index)
+    start.wait()
+    for i in range(scores):
+        AuthDB.record_score(user_id, rnd.randint(1, 3), rnd.randint(5, 500))
+        if i % 50 == 0:
+            AuthDB.add_country_progress(user_id, COUNTRIES[(i // 50) % len(COUNTRIES)])
+    AuthDB.shutdown()
+
+
+def scanned_top_times(store, level: int) -> list:
+    """Reference leaderboard: every score of the level scanned, best time per user, ties in the order the
+    players first finished the level."""
+    best, first = {}, {}
+    for score in store.iter_scores():
+        if score["level"] != level:
+            continue
+        user_id = score["user_id"]
+        first.setdefault(user_id, score["id"])
+        if user_id not in best or score["time_sec"] < best[user_id]:
+            best[user_id] = score["time_sec"]
+    rows = sorted((time_sec, first[user_id], user_id) for user_id, time_sec in best.items())
+    return [(AuthDB._username(user_id), time_sec) for time_sec, _, user_id in rows]
+
+
+def verify(directory: str, backend: str, processes: int, scores: int, killed: bool) -> list:
+    setup(directory, backend, 1 << 30)
+    AuthDB.init_db()
+    store = AuthDB._store()
+    problems = list(AuthDB.check_indexes())
+    all_scores = list(store.iter_scores())
+    ids = [s["id"] for s in all_scores]
+    if len(ids) != len(set(ids)):
+        problems.append(f"{len(ids) - len(set(ids))} duplicate score ids")
+    for index in range(processes):
+        user_id = AuthDB.user_id_by_username(f"stress{index}")
+        if user_id is None:
+            problems.append(f"user stress{index} missing")
+            continue
+        count = sum(1 for s in all_scores if s["user_id"] == user_id)
+        if count != scores:
+            problems.append(f"stress{index}: {count} scores, expected {scores} ({scores - count} lost)")
+        expected = {COUNTRIES[(i // 50) % len(COUNTRIES)] for i in range(0, scores, 50)}
+        if set(AuthDB.get_progress(user_id)) != expected:
+            problems.append(f"stress{index}: progress {AuthDB.get_progress(user_id)}")
+    for level in (1, 2, 3):
+        if AuthDB.top_times(level, 1000) != scanned_top_times(store, level):
+            problems.append(f"leaderboard for level {level} differs from the scores")
+    extra = len(all_scores) - processes * scores
+    if extra and not killed:
+        problems.append(f"{extra} scores from unknown writers")
+    print(f"{processes * scores} scores from {processes} processes"
+          + (f" + {extra} from the killed process" if killed else ""))
+    AuthDB.shutdown()
+    return problems
+
+
+def check_reads(directory: str, backend: str) -> list:
+    """Each write must show in the next read, whether or not the writer thread has flushed it yet."""
+    setup(directory, backend, 1 << 30)
+    AuthDB.init_db()
+    ok, data = AuthDB.create_user("reader", "password")
+    if not ok:
+        return [f"reader: {data}"]
+    user_id = data["user_id"]
+    rnd = random.Random(0)
+    best = {}
+    progress = set()
+    problems = []
+    for i in range(300):
+        level, time_sec = rnd.randint(1, 3), rnd.randint(5, 500)
+        version = AuthDB.leaderboard_version()
+        AuthDB.record_score(user_id, level, time_sec)
+        improved = level not in best or time_sec < best[level]
+        best[level] = min(best.get(level, time_sec), time_sec)
+        if AuthDB.top_times(level, 1) != [("reader", best[level])] or AuthDB.rank_of_user(user_id, level) != 1:
+            problems.append(f"score {i} not on the leaderboard: {AuthDB.top_times(level, 1)}, expected {best[level]}")
+        if improved and AuthDB.leaderboard_version() == version:
+            problems.append(f"score {i} improved level {level} but leaderboard_version did not change")
+        country = COUNTRIES[i % len(COUNTRIES)]
+        if i % 10 < len(COUNTRIES):
+            AuthDB.add_country_progress(user_id, country)
+            progress.add(country)
+        else:
+            AuthDB.remove_country_progress(user_id, country)
+            progress.discard(country)
+        if set(AuthDB.get_progress(user_id)) != progress or AuthDB.has_access(user_id, country) != (country in progress):
+            problems.append(f"progress after change {i}: {AuthDB.get_progress(user_id)}, expected {sorted(progress)}")
+        if problems:
+            break
+    AuthDB.shutdown()
+    print(f"{backend}: reads after writes checked")
+    return problems
+
+
+def check_failed_flush(directory: str) -> list:
+    """Pickle: a journal write that fails halfway must be cut off, and the queued scores and progress kept
+    (and still readable) until a later flush writes them."""
+    setup(directory, "pickle", 1 << 30)
+    policy, AuthDB.FLUSH_POLICY = AuthDB.FLUSH_POLICY, "shutdown"
+    AuthDB.init_db()
+    ok, data = AuthDB.create_user("flusher", "password")
+    if not ok:
+        return [f"flusher: {data}"]
+    user_id = data["user_id"]
+    AuthDB.flush()
+    store = AuthDB._store()
+    append_journal = AuthDB._append_journal
+
+    def broken(path, records):
+        # Half a record reaches the file before the error, like a full disk
+        with open(path, "ab") as f:
+            f.write(b"\x00\x00\x10\x00half")
+        raise OSError("disk full")
+
+    problems = []
+    AuthDB._append_journal = broken
+    try:
+        for i in range(5):
+            AuthDB.record_score(user_id, 1, 100 - i)
+        AuthDB.add_country_progress(user_id, "Japan")
+        try:
+            AuthDB.flush()
+            problems.append("flush with a failing journal write did not raise")
+        except OSError:
+            pass
+        if os.path.getsize(store.journal_path) != store.journal_offset:
+            problems.append("journal not cut back after the failed write")
+        if len(store.pending) != 6:
+            problems.append(f"{len(store.pending)} queued entries after the failed flush, expected 6")
+        if store.db["scores"] or store.db["counters"]["scores"]:
+            problems.append("failed flush changed the database in memory")
+        if AuthDB.top_times(1, 1) != [("flusher", 96)] or not AuthDB.has_access(user_id, "Japan"):
+            problems.append("queued entries not readable after the failed flush")
+    finally:
+        AuthDB._append_journal = append_journal
+        AuthDB.FLUSH_POLICY = policy
+    AuthDB.flush()
+    db = AuthDB._load_db(AuthDB.DB_PATH)[0]
+    if [(s["id"], s["time_sec"]) for s in db["scores"]] != [(i + 1, 100 - i) for i in range(5)]:
+        problems.append(f"scores on disk after the retry: {[(s['id'], s['time_sec']) for s in db['scores']]}")
+    if db["users"][0]["progress"] != {"Japan": True}:
+        problems.append(f"progress on disk after the retry: {db['users'][0]['progress']}")
+    AuthDB.shutdown()
+    print("pickle: failed flush checked")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=8)
+    parser.add_argument("--scores", type=int, default=500, help="scores per process")
+    parser.add_argument("--backend", choices=("pickle", "sqlite"), default="pickle")
+    parser.add_argument("--compact-bytes", type=int, default=16 * 1024,
+                        help="small journal limit, so that compactions happen while others write")
+    parser.add_argument("--kill", action="store_true", help="also SIGKILL one writer in the middle of its run")
+    parser.add_argument("--keep", action="store_true", help="keep the data directory")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="authdb-stress-")
+    setup(directory, args.backend, args.compact_bytes)
+    AuthDB.init_db()
+    AuthDB.shutdown()
+
+    start = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=worker, args=(i, directory, args.backend, args.compact_bytes,
+                                                             args.scores, start)) for i in range(args.processes)]
+    victim = None
+    if args.kill:
+        victim = multiprocessing.Process(target=worker, args=(args.processes, directory, args.backend,
+                                                              args.compact_bytes, 10 ** 9, start))
+    for process in workers + ([victim] if victim else []):
+        process.start()
+    began = time.perf_counter()
+    start.set()
+    if victim:
+        time.sleep(0.5)
+        victim.kill()
+        victim.join()
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - began
+    failed = [p for p in workers if p.exitcode != 0]
+    total = args.processes * args.scores
+    print(f"{args.backend}: {total} scores in {elapsed:.2f} s ({total / elapsed:,.0f} per second)")
+
+    problems = [f"worker exited with {p.exitcode}" for p in failed]
+    problems += verify(directory, args.backend, args.processes, args.scores, victim is not None)
+    problems += check_reads(os.path.join(directory, "reads"), args.backend)
+    if args.backend == "pickle":
+        problems += check_failed_flush(os.path.join(directory, "flush"))
+    if args.keep:
+        print("data kept in", directory)
+    else:
+        shutil.rmtree(directory, ignore_errors=True)
+    if problems:
+        print("FAILED")
+        for problem in problems:
+            print("  " + problem)
+        sys.exit(1)
+    print("OK: no lost or duplicated updates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Picks the PBKDF2 iteration count for AuthDB.KDF_ITERATIONS on this machine.
+Times the password hash for a few iteration counts and reports the largest count that stays within the target
+latency (one login/sign-up = one hash, two when an old hash is upgraded on login). Run from the Maze-main directory:
+    python OtherResources/Programs/KDFCalibration.py [target_ms] [algorithm]
+e.g. python OtherResources/Programs/KDFCalibration.py 250 pbkdf2_sha256
+"""
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from Modules import AuthDB
+
+ROUNDS = 5
+
+
+def hash_ms(algorithm: str, iterations: int) -> float:
+    # Median of a few runs, so a single hiccup of the machine doesn't decide the result
+    salt = secrets.token_bytes(16)
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        AuthDB._hash_password("calibration", salt, (algorithm, iterations))
+        times.append((time.perf_counter() - start) * 1000)
+    return sorted(times)[ROUNDS // 2]
+
+
+def calibrate(target_ms: float, algorithm: str):
+    # PBKDF2 cost is linear in the iteration count: measure once, scale, then check the estimate
+    probe = 20_000
+    per_iteration = hash_ms(algorithm, probe) / probe
+    iterations = max(10_000, int(target_ms / per_iteration) // 10_000 * 10_000)
+    measured = hash_ms(algorithm, iterations)
+    while iterations > 10_000 and measured > target_ms:
+        iterations -= 10_000
+        measured = hash_ms(algorithm, iterations)
+    return iterations, measured
+
+
+if __name__ == "__main__":
+    target = float(sys.argv[1]) if len(sys.argv) > 1 else 250.0
+    algorithm = sys.argv[2] if len(sys.argv) > 2 else AuthDB.KDF_ALGORITHM
+    if algorithm not in AuthDB.KDF_ALGORITHMS:
+        sys.exit(f"unknown algorithm {algorithm!r}, choose one of {', '.join(AuthDB.KDF_ALGORITHMS)}")
+
+    print(f"{algorithm}, median of {ROUNDS} hashes:")
+    for iterations in (50_000, 100_000, 200_000, 400_000):
+        print(f"  {iterations:>9,} iterations  {hash_ms(algorithm, iterations):8.1f} ms")
+    print(f"  current setting ({AuthDB.KDF_ITERATIONS:,}): {hash_ms(AuthDB.KDF_ALGORITHM, AuthDB.KDF_ITERATIONS):.1f} ms")
+
+    best, measured = calibrate(target, algorithm)
+    print(f"\nlargest count within {target:g} ms: {best:,} ({measured:.1f} ms)")
+    print(f'set in Modules/AuthDB.py:  KDF_ALGORITHM = "{algorithm}"  KDF_ITERATIONS = {best:_}')
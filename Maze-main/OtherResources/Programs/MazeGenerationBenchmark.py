@@ -0,0 +1,111 @@
+"""
+Benchmark of maze generation time against maze size.
+Times PlayGame.Maze (the iterative backtracker in MazeGenerators) for square mazes from 20x20 up to 2000x2000
+and, for the sizes where it still fits on a big thread stack, the old recursive carve_maze (shuffle per cell).
+The other algorithms are compared in MazeGeneratorComparison.py. Every generated maze is checked to be perfect:
+all cells reachable from (1, 1) with exactly one path between any two. Run from the Maze-main directory:
+    python OtherResources/Programs/MazeGenerationBenchmark.py [sizes ...]
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+from Modules import MazeGenerators
+from Modules.PlayGame import Maze
+
+SIZES = [20, 40, 100, 200, 500, 1000, 2000]
+# The recursive version needs about one Python frame per cell on the path; past this it is not worth the stack
+RECURSIVE_MAX = 500
+SEED = 1
+
+
+class RecursiveMaze(Maze):
+    """The backtracker as it was before: one recursive call per carved cell."""
+
+    def generate_maze(self):
+        cells = MazeGenerators.new_cells(self.width, self.height)
+        cells[self.width + 2] = 0  # (1, 1)
+        self.carve_maze(1, 1, cells)
+        self.grid = MazeGenerators.as_grid(cells, self.width, self.height)
+
+    def carve_maze(self, x, y, maze):
+        stride = self.width + 1
+        ValidDirections = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+        self.random.shuffle(ValidDirections)
+        for dx, dy in ValidDirections:
+            nx, ny = x + dx * 2, y + dy * 2
+            if 0 <= nx < self.width and 0 <= ny < self.height and maze[ny * stride + nx] == 1:
+                maze[ny * stride + nx] = 0
+                maze[(ny - dy) * stride + nx - dx] = 0
+                self.carve_maze(nx, ny, maze)
+
+
+def is_perfect(maze):
+    """A spanning tree over the carved cells: every cell (odd x, odd y) reachable and open cells = 2 * cells - 1."""
+    cells = len(range(1, maze.width, 2)) * len(range(1, maze.height, 2))
+    open_cells = int((maze.maze == 0).sum())
+    seen = {(1, 1)}
+    queue = deque([(1, 1)])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (nx, ny) not in seen and maze.is_path(nx, ny):
+                seen.add((nx, ny))
+                queue.append((nx, ny))
+    return open_cells == 2 * cells - 1 and len(seen) == open_cells
+
+
+def best_of(function, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run_recursive(size, repeats):
+    """In a thread with a 1 GB stack and a raised recursion limit, the way the game used to need it."""
+    out = {}
+
+    def target():
+        old_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(old_limit, size * size))
+        try:
+            out["result"] = best_of(lambda: RecursiveMaze(size, size, Seed=SEED), repeats)
+        finally:
+            sys.setrecursionlimit(old_limit)
+
+    threading.stack_size(1 << 30)
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    threading.stack_size(0)
+    return out["result"]
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or SIZES
+    print(f"recursion limit {sys.getrecursionlimit()} (untouched)")
+    print(f"{'size':>11s} {'cells':>9s} {'iterative':>11s} {'ns/cell':>8s} {'recursive':>11s} {'speedup':>6s}")
+    for size in sizes:
+        repeats = max(1, min(20, 400_000 // (size * size)))
+        seconds, maze = best_of(lambda: Maze(size, size, Seed=SEED), repeats)
+        cells = size * size
+        assert is_perfect(maze), f"{size}x{size} is not a perfect maze"
+        line = f"{size:>5d}x{size:<5d} {cells:>9d} {seconds * 1000:>8.2f} ms {seconds / cells * 1e9:>8.0f}"
+        if size <= RECURSIVE_MAX:
+            old_seconds, old = run_recursive(size, repeats)
+            assert is_perfect(old)
+            line += f" {old_seconds * 1000:>8.2f} ms {old_seconds / seconds:>5.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Comparison of the maze generation algorithms in Modules/MazeGenerators.py.
+For every algorithm and square size this reports:
+    time       best of several runs, and cells (width * height) per second
+    peak MB    peak memory allocated while generating one maze (tracemalloc, numpy included)
+    dead ends  share of the cells with a single opening: many short dead ends = bushy, few = long corridors
+    solution   length of the path from start to home as a share of the cells: longer = harder
+    turns      direction changes per 100 steps of the solution: few = long straight runs
+Every maze is checked to be perfect (all cells reachable, exactly one path between any two).
+Run from the Maze-main directory:
+    python OtherResources/Programs/MazeGeneratorComparison.py [--sizes 40 200 1000] [--algorithms eller prim] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+from Modules import MazeGenerators
+from Modules.PlayGame import Maze
+
+SIZES = [40, 200, 1000]
+SEED = 1
+
+
+def even_size(text) -> int:
+    """argparse type for --sizes: the start is at (size - 1, size - 1), which is a wall when size is odd."""
+    size = int(text)
+    if size < 4 or size % 2:
+        raise argparse.ArgumentTypeError(f"sizes must be even and at least 4, not {text}")
+    return size
+
+
+def is_perfect(grid, width, height) -> bool:
+    """Flood fill from (1, 1) over the flat grid; a tree over the cells has exactly 2 * cells - 1 open squares."""
+    stride = width + 1
+    cells = bytearray(grid.tobytes())
+    open_count = cells.count(0)
+    stack = [stride + 1]
+    cells[stride + 1] = 2
+    seen = 1
+    while stack:
+        i = stack.pop()
+        for n in (i - stride, i + 1, i + stride, i - 1):
+            if n >= 0 and cells[n] == 0:
+                cells[n] = 2
+                seen += 1
+                stack.append(n)
+    return open_count == 2 * (width // 2) * (height // 2) - 1 and seen == open_count
+
+
+def dead_ends(grid) -> float:
+    """Share of the cells (odd x, odd y) with exactly one open neighbour."""
+    is_open = grid == 0
+    centre = is_open[1:-1:2, 1:-1:2]
+    exits = (is_open[0:-2:2, 1:-1:2].astype(np.int8) + is_open[2::2, 1:-1:2]
+             + is_open[1:-1:2, 0:-2:2] + is_open[1:-1:2, 2::2])
+    return float(((exits == 1) & centre).sum() / max(centre.sum(), 1))
+
+
+def turns(path: str) -> float:
+    changes = sum(1 for a, b in zip(path, path[1:]) if a != b)
+    return 100 * changes / max(len(path), 1)
+
+
+def best_of(function, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(name, size, seed) -> dict:
+    cells = size * size
+    repeats = max(1, min(10, 400_000 // cells))
+    seconds, grid = best_of(lambda: MazeGenerators.generate(name, size, size, random.Random(seed)), repeats)
+    tracemalloc.start()
+    MazeGenerators.generate(name, size, size, random.Random(seed))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert is_perfect(grid, size, size), f"{name} {size}x{size} is not a perfect maze"
+    path = Maze(size, size, Seed=seed, Algorithm=name).solve_maze_a_star()
+    return {
+        "algorithm": name,
+        "size": size,
+        "ms": round(seconds * 1000, 3),
+        "cells_per_s": round(cells / seconds),
+        "peak_mb": round(peak / 2 ** 20, 2),
+        "dead_ends": round(dead_ends(grid), 3),
+        "solution": round(len(path) / cells, 3),
+        "turns": round(turns(path), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", type=even_size, default=SIZES, help="even maze sizes (width = height)")
+    parser.add_argument("--algorithms", nargs="+", choices=list(MazeGenerators.GENERATORS),
+                        default=list(MazeGenerators.GENERATORS))
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--json", help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'algorithm':<12s} {'size':>11s} {'time':>11s} {'Mcells/s':>9s} {'peak MB':>8s} "
+          f"{'dead ends':>9s} {'solution':>8s} {'turns':>6s}")
+    for size in args.sizes:
+        for name in args.algorithms:
+            r = measure(name, size, args.seed)
+            results.append(r)
+            print(f"{name:<12s} {size:>5d}x{size:<5d} {r['ms']:>8.2f} ms {r['cells_per_s'] / 1e6:>9.2f} "
+                  f"{r['peak_mb']:>8.2f} {r['dead_ends']:>8.1%} {r['solution']:>8.1%} {r['turns']:>6.1f}",
+                  flush=True)
+        print()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"seed": args.seed, "results": results}, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark of the chunked endless world (Modules/MazeWorld.py). First checks that
+    - a chunk is the same whether it was generated in the background, on the game thread or again after eviction
+    - every open square of a block of chunks around the start is reachable from the start (connected borders)
+Then flies the camera of a real GamePlay (dummy video driver) through the world at the player's top speed and times
+every frame of DisplayMazeBackground, once with the background prefetch and once generating every chunk on the
+game thread when it is first drawn. Reported: frame time p50/p99/max in ms and how many chunks the game thread had
+to generate itself (misses). Run from the Maze-main directory:
+    python OtherResources/Programs/MazeWorldBenchmark.py [--seconds 20] [--chunk 32] [--algorithm backtracker]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame
+
+pygame.init()
+screen = pygame.display.set_mode((1440, 810))
+
+from Modules import MazeGenerators
+from Modules.MazeWorld import MazeWorld
+from Modules.PlayGame import GamePlay
+
+SEED = 1
+FPS = 60
+
+
+def check(chunk, algorithm):
+    world = MazeWorld(Seed=SEED, Chunk=chunk, Algorithm=algorithm)
+    tiny = MazeWorld(Seed=SEED, Chunk=chunk, Algorithm=algorithm, MaxChunks=2)
+    world.prefetch(-3 * chunk, -3 * chunk, 3 * chunk, 3 * chunk)
+    world.wait()
+    assert world.stats()["misses"] == 0, "prefetch left chunks for the game thread"
+    window = (-3 * chunk, -3 * chunk, 6 * chunk, 6 * chunk)
+    cells = world.open_cells(*window)
+    assert np.array_equal(cells, tiny.open_cells(*window)), "chunks differ after eviction"
+    assert np.array_equal(cells, tiny.open_cells(*window)), "chunks differ when generated again"
+    assert tiny.stats()["evicted"] > 0
+    # Flood fill inside the window from the start
+    height, width = cells.shape
+    x, y = 1 - window[0], 1 - window[1]
+    seen = np.zeros_like(cells)
+    seen[y, x] = True
+    stack = [(x, y)]
+    while stack:
+        x, y = stack.pop()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < width and 0 <= ny < height and cells[ny, nx] and not seen[ny, nx]:
+                seen[ny, nx] = True
+                stack.append((nx, ny))
+    assert np.array_equal(seen, cells), f"{int(cells.sum() - seen.sum())} open squares not reachable from the start"
+
+
+def fly(seconds, chunk, algorithm, prefetch) -> dict:
+    game = GamePlay(screen, "benchmark", "media/images/Player", "media/images/MazeBackground", os.devnull,
+                    "media/images/GameOver.png", MazeLevels={1: (None, None, algorithm)})
+    game.Level = 1
+    game.SetMazeLevel()
+    world = MazeWorld(Seed=SEED, Chunk=chunk, Algorithm=algorithm)
+    game.MazeGame = world
+    if not prefetch:
+        world.prefetch = lambda *cells: None
+    samples = []
+    # A spiral outwards at MoveSpeed cells per second, so it keeps reaching new chunks in every direction
+    for frame in range(int(seconds * FPS)):
+        t = frame / FPS
+        angle = t * 0.5
+        radius = game.MoveSpeed * t / 2
+        position = (radius * math.cos(angle), radius * math.sin(angle))
+        game.PlayerCellCoordinates = (round(position[0]), round(position[1]))
+        game.PlayerPosition = position
+        start = time.perf_counter()
+        game.DisplayMazeBackground()
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            world.is_path(game.PlayerCellCoordinates[0] + dx, game.PlayerCellCoordinates[1] + dy)
+        samples.append((time.perf_counter() - start) * 1000)
+        # The rest of a 60 FPS frame, which is when the background thread gets its time in the game too
+        time.sleep(max(0.0, 1 / FPS - samples[-1] / 1000))
+    world.wait()
+    samples.sort()
+    return {
+        "p50": samples[len(samples) // 2],
+        "p99": samples[int(len(samples) * 0.99)],
+        "max": samples[-1],
+        "over_budget": sum(1 for s in samples if s > 1000 / FPS),
+        **world.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20, help="game time to fly for, per run")
+    parser.add_argument("--chunk", type=int, default=32, help="MazeWorld Chunk")
+    parser.add_argument("--algorithm", choices=list(MazeGenerators.GENERATORS), default="backtracker")
+    args = parser.parse_args()
+
+    check(args.chunk, args.algorithm)
+    print("checks OK: chunks are deterministic, borders connect every chunk to the start")
+    print(f"{'':<22s} {'p50 ms':>7s} {'p99 ms':>7s} {'max ms':>7s} {'>16.7ms':>7s} {'misses':>6s} "
+          f"{'generated':>9s} {'chunk ms':>8s}")
+    for name, prefetch in (("background prefetch", True), ("on the game thread", False)):
+        r = fly(args.seconds, args.chunk, args.algorithm, prefetch)
+        print(f"{name:<22s} {r['p50']:>7.2f} {r['p99']:>7.2f} {r['max']:>7.2f} {r['over_budget']:>7d} "
+              f"{r['misses']:>6d} {r['generated']:>9d} {r['max_generate_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Micro-benchmark of one frame of PlayGame.Player.animate.
+Compares the old way (scaling all four frames of the direction every frame, plus the chosen one again)
+with the cached sprite sheet. Run from the Maze-main directory:
+    python OtherResources/Programs/PlayerAnimationBenchmark.py
+"""
+import os
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+import pygame
+
+pygame.init()
+screen = pygame.display.set_mode((1440, 810))
+
+from Modules.PlayGame import Player
+
+FRAMES = 5000
+PlayerWidth = 81
+center = (445.5, 405)
+player = Player(screen, "media/images/Player")
+keys = pygame.key.get_pressed()
+
+
+def animate_uncached(TimePassed):
+    size = (int(PlayerWidth * 8 / 10), int(PlayerWidth * 8 / 10))
+    rect = [pygame.transform.scale(player.image[player.direction][i], size).get_rect(center=center) for i in range(4)]
+    frame_index = int((int(TimePassed) % 400) / 100)
+    screen.blit(pygame.transform.scale(player.image[player.direction][frame_index], size), rect[frame_index])
+
+
+def animate_cached(TimePassed):
+    player.animate(keys, TimePassed, PlayerWidth, center)
+
+
+if __name__ == "__main__":
+    for name, function in (("before (scale per frame)", animate_uncached), ("after (sprite sheet)", animate_cached)):
+        seconds = timeit.timeit(lambda: function(pygame.time.get_ticks()), number=FRAMES)
+        print(f"{name:26s} {seconds / FRAMES * 1e6:8.1f} us/frame")
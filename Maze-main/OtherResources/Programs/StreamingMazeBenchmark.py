@@ -0,0 +1,112 @@
+"""
+Benchmark of the endless maze (PlayGame.StreamingMaze). A camera of --view rows walks down --depth rows the way the
+renderer asks for them (open_cells of the visible rows, is_path next to the player) and the memory in use is sampled
+along the way: it should stay flat, the spilled rows only grow the file on disk. Also checks that
+    - rows read back from the spill file are the rows that were generated
+    - the first rows are the same as a finite Maze(width, height, Algorithm="eller") with the same seed
+    - every open cell of the streamed rows can reach the deepest row, so the player can always go further down
+Run from the Maze-main directory:
+    python OtherResources/Programs/StreamingMazeBenchmark.py [--width 40] [--depth 200000] [--window 256]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.getcwd())
+
+from Modules import MazeGenerators
+from Modules.PlayGame import Maze, StreamingMaze
+
+SEED = 1
+
+
+def reaches_bottom(grid) -> bool:
+    """Flood fill upwards from the open squares of the last row; True if it reaches every open square."""
+    height, stride = grid.shape
+    cells = bytearray(grid.tobytes())
+    stack = [(height - 1) * stride + x for x in range(stride) if cells[(height - 1) * stride + x] == 0]
+    for i in stack:
+        cells[i] = 2
+    while stack:
+        i = stack.pop()
+        for n in (i - stride, i + 1, i + stride, i - 1):
+            if 0 <= n < len(cells) and cells[n] == 0:
+                cells[n] = 2
+                stack.append(n)
+    return cells.count(0) == 0
+
+
+def check(width, window):
+    maze = StreamingMaze(width, Seed=SEED, Window=window)
+    rows = 10 * window
+    streamed = maze.grid_rows(0, rows)
+    assert maze.first > 0, "nothing was spilled"
+    fresh = MazeGenerators.eller_rows(width, None, random.Random(SEED))
+    expected = np.frombuffer(b"".join(next(fresh) for _ in range(rows)), dtype=np.uint8).reshape(rows, width + 1)
+    assert np.array_equal(streamed, expected), "spilled rows differ from the generated ones"
+    # The last cell row of a finite maze is closed differently, everything above it is the same
+    finite = Maze(width, rows, Seed=SEED, Algorithm="eller")
+    assert np.array_equal(finite.grid[:rows - 2], streamed[:rows - 2]), "streamed rows differ from Maze"
+    assert reaches_bottom(streamed), "some cells cannot reach the deepest row"
+    assert all(maze.is_path(x, y) == (streamed[y, x] == 0) for y in range(0, rows, 7) for x in range(width + 1))
+    maze.close()
+
+
+def walk(maze, depth, view, sample=None):
+    """Moves the camera down to depth; calls sample(y) about ten times on the way."""
+    step = max(depth // 10, 1)
+    for y in range(0, depth + 1, view // 2):
+        maze.open_cells(-1, y - view // 2, maze.width + 2, view)
+        maze.is_path(1, y)
+        if sample and y and y % step < view // 2:
+            sample(y)
+
+
+def timed_walk(width, depth, window, view) -> float:
+    """Rows per second, without tracemalloc (which slows allocations down about ten times)."""
+    maze = StreamingMaze(width, Seed=SEED, Window=window)
+    start = time.perf_counter()
+    walk(maze, depth, view)
+    rate = depth / (time.perf_counter() - start)
+    maze.close()
+    return rate
+
+
+def traced_walk(width, depth, window, view):
+    """[(depth, MB in use, MB peak)] and the size of the spill file in bytes."""
+    maze = StreamingMaze(width, Seed=SEED, Window=window)
+    samples = []
+    tracemalloc.start()
+    walk(maze, depth, view, lambda y: samples.append((y, *(m / 2 ** 20 for m in tracemalloc.get_traced_memory()))))
+    tracemalloc.stop()
+    spilled = maze.spill.seek(0, 2)
+    maze.close()
+    return samples, spilled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=40)
+    parser.add_argument("--depth", type=int, default=200_000, help="rows to walk down")
+    parser.add_argument("--window", type=int, default=256, help="StreamingMaze Window")
+    parser.add_argument("--view", type=int, default=24, help="rows on the screen")
+    args = parser.parse_args()
+
+    check(args.width, args.window)
+    print("checks OK: spilled rows, same rows as Maze, every cell reaches the bottom")
+    print(f"{timed_walk(args.width, args.depth, args.window, args.view):,.0f} rows per second")
+    samples, spilled = traced_walk(args.width, args.depth, args.window, args.view)
+    print(f"{'depth':>10s} {'MB in use':>10s} {'MB peak':>8s}")
+    for y, current, peak in samples:
+        print(f"{y:>10d} {current:>10.3f} {peak:>8.3f}")
+    print(f"spill file {spilled / 2 ** 20:.2f} MB ({spilled / args.depth:.1f} bytes per row)")
+
+
+if __name__ == "__main__":
+    main()
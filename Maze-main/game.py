@@ -1,28 +1,32 @@
-import time 
 import random
 import pygame
 from settings import *
-from Modules import AuthDB  
 
-_prev_country_prev_clicked = False
-_prev_country_next_clicked = False
-_prev_country_back_clicked = False
-
-LOCK_IMAGE_PATH = "media/images/buttons/lock.png"
+LOCK_IMAGE_PATH = "media/images/Buttons/lock.png"
 _lock_img = None
-def _lock_icon_surface():
-    global _lock_img
-    if _lock_img is None:
+_lock_img_tried = False
+_lock_scaled = {}
+def _lock_icon_surface(size):
+    # laddas (och skalas) bara en gång, även om filen saknas
+    global _lock_img, _lock_img_tried
+    if not _lock_img_tried:
+        _lock_img_tried = True
         try:
             _lock_img = pygame.image.load(LOCK_IMAGE_PATH).convert_alpha()
         except Exception:
             _lock_img = None
-    return _lock_img
+    if _lock_img is None:
+        return None
+    if size not in _lock_scaled:
+        _lock_scaled[size] = pygame.transform.smoothscale(_lock_img, (size, size))
+    return _lock_scaled[size]
 
 # PYGAME LOOP
 start_ticks = pygame.time.get_ticks()
 while True:
-    PygameEvents = pygame.event.get()
+    PygameEvents = Scheduler.Events()
+    LogicSteps = Scheduler.LogicSteps()
+    Input.Update(PygameEvents)
     keys = pygame.key.get_pressed()
     # Mouse Position
     MousePosition = pygame.mouse.get_pos()
@@ -83,6 +87,8 @@ while True:
             LoginScreen.is_active = False
             # Sätt spelarnamnet så det följer med i spelet
             Game.PlayerName = LoginScreen.username
+            # Progress läses in en gång per inloggning
+            Progress.load(LoginScreen.user_id)
             main_menu.is_active = True
 
 
@@ -102,30 +108,25 @@ while True:
         screen.blit(MainMenuMazeText, MainMenuMazeText_rect)
         # Main Menu Buttons
         main_menu.Buttons()
-        if MM_Quit.is_Clicked():
+        if Input.Clicked(MM_Quit):
             Quit()
-        elif MM_Play.is_Clicked():
+        elif Input.Clicked(MM_Play, ButtonDelay):
             main_menu.is_active = False
-            time.sleep(ButtonDelay)
             # Game.is_active = True                
             CountrySelectionActive = True         
-        elif MM_Scores.is_Clicked():
+        elif Input.Clicked(MM_Scores, ButtonDelay):
             main_menu.is_active = False
-            time.sleep(ButtonDelay)
-            Scores.is_active = True
-        elif MM_Preferences.is_Clicked():
+            Scores.Open()
+        elif Input.Clicked(MM_Preferences, ButtonDelay):
             main_menu.is_active = False
-            time.sleep(ButtonDelay)
             GamePreferences.is_active = True
-            if GameOver_Back.is_Clicked():
-                Game.MazeGame = None
+            if Input.Clicked(GameOver_Back, BackButtonDelay):
+                Game.CloseMaze()
                 Scores.GameDone = False
                 Game.is_active = False
                 Game.GameOverScreen = False
                 Game.LevelScreen = True
                 main_menu.is_active = True
-                Game.db_recorded = False  
-                time.sleep(BackButtonDelay)
                 pygame.mixer.music.stop()
                 pygame.mixer.music.load(IntroMusicAddress)
                 pygame.mixer.music.set_volume(0.25 * int(GamePreferences.MusicState))
@@ -158,40 +159,16 @@ while True:
         # knappar (progress-lås + LÅSIKON) 
         for i_btn, btn in enumerate(page_buttons):
             btn.display()
-            country_id = Countries.COUNTRIES[start + i_btn]["country"]
 
-            # hämta user_id från spelarnamn utan att röra login.py
-            uid = None
-            if hasattr(Game, "PlayerName") and Game.PlayerName:
-                try:
-                    uid = AuthDB.user_id_by_username(str(Game.PlayerName))
-                except Exception:
-                    uid = None
-
-            # UNLOCK RULES: 1) bana 1 alltid öppen
-            #               2) denna bana redan klar
-            #               3) föregående bana klar → lås upp denna
-            unlocked = False
-            idx = start + i_btn
-            if idx == 0:
-                unlocked = True
-            else:
-                if uid is not None and AuthDB.has_access(uid, country_id):
-                    unlocked = True
-                else:
-                    prev_id = Countries.COUNTRIES[idx - 1]["country"]
-                    if uid is not None and AuthDB.has_access(uid, prev_id):
-                        unlocked = True
-
-            if not unlocked:
+            # Upplåsningsreglerna är förberäknade i Progress (ingen DB-läsning per frame)
+            if not Progress.is_unlocked(start + i_btn):
                 # Rita en låsikon centrerad på knappen (ca 80% )
                 rect = getattr(btn, "ButtonRect", None) or getattr(btn, "rect", None)
-                icon = _lock_icon_surface()
-                if rect and icon:
+                if rect:
                     size = int(min(rect.width, rect.height) * 0.8)
-                    if size > 0:
-                        icon_scaled = pygame.transform.smoothscale(icon, (size, size))
-                        screen.blit(icon_scaled, (rect.centerx - size // 2, rect.centery - size // 2))
+                    icon = _lock_icon_surface(size) if size > 0 else None
+                    if icon:
+                        screen.blit(icon, (rect.centerx - size // 2, rect.centery - size // 2))
 
         # Navigation
         if total > COUNTRIES_PER_PAGE:
@@ -202,72 +179,38 @@ while True:
         else:
             CountryBack.display()
 
-        cur_prev = (CountryPage > 0 and CountryPrev.is_Clicked()) if total > COUNTRIES_PER_PAGE else False  
-        cur_next = (end < total and CountryNext.is_Clicked()) if total > COUNTRIES_PER_PAGE else False      
-        cur_back = CountryBack.is_Clicked() if not (total > COUNTRIES_PER_PAGE) else False                   
-
-        prev_edge = cur_prev and not _prev_country_prev_clicked  
-        next_edge = cur_next and not _prev_country_next_clicked   
-        back_edge = cur_back and not _prev_country_back_clicked   
-
-        _prev_country_prev_clicked = cur_prev   
-        _prev_country_next_clicked = cur_next  
-        _prev_country_back_clicked = cur_back   
+        prev_edge = (CountryPage > 0 and Input.Clicked(CountryPrev, ButtonDelay)) if total > COUNTRIES_PER_PAGE else False
+        next_edge = (end < total and Input.Clicked(CountryNext, ButtonDelay)) if total > COUNTRIES_PER_PAGE else False
+        back_edge = Input.Clicked(CountryBack, BackButtonDelay) if not (total > COUNTRIES_PER_PAGE) else False
 
         # Click handling (ignorera klick på låsta)
         for i_btn, btn in enumerate(page_buttons):
-            if btn.is_Clicked():
+            if Input.Clicked(btn, ButtonDelay):
                 country_id = Countries.COUNTRIES[start + i_btn]["country"]
 
-                uid = None
-                if hasattr(Game, "PlayerName") and Game.PlayerName:
-                    try:
-                        uid = AuthDB.user_id_by_username(str(Game.PlayerName))
-                    except Exception:
-                        uid = None
-
                 # UNLOCK RULES (samma som vid ritning)
-                unlocked = False
-                idx = start + i_btn
-                if idx == 0:
-                    unlocked = True
-                else:
-                    if uid is not None and AuthDB.has_access(uid, country_id):
-                        unlocked = True
-                    else:
-                        prev_id = Countries.COUNTRIES[idx - 1]["country"]
-                        if uid is not None and AuthDB.has_access(uid, prev_id):
-                            unlocked = True
-
-                if not unlocked:
+                if not Progress.is_unlocked(start + i_btn):
                     continue  # låst → gör inget
 
-                time.sleep(ButtonDelay)
                 SelectedCountry = country_id
                 SelectedCities = Countries.COUNTRIES[start + i_btn]["cities"]
                 CountrySelectionActive = False
                 Game.is_active = True
                 Game.LevelScreen = True
-                # FIX: ny runda startar → progress får sparas igen
-                Game.progress_recorded = False  
                 break
 
         if total > COUNTRIES_PER_PAGE:
             if prev_edge:                             
                 CountryPage = max(0, CountryPage - 1) 
-                time.sleep(ButtonDelay)
             if next_edge:                             
                 CountryPage = min(max_page, CountryPage + 1) 
-                time.sleep(ButtonDelay)
             if back_edge:                              
                 CountrySelectionActive = False
                 main_menu.is_active = True
-                time.sleep(BackButtonDelay)
         else:
             if back_edge:  
                 CountrySelectionActive = False
                 main_menu.is_active = True
-                time.sleep(BackButtonDelay)
 
     # The Game!
     if Game.is_active:
@@ -278,18 +221,18 @@ while True:
             GLB_Easy.display()
             GLB_Medium.display()
             GLB_Difficult.display()
+            GLB_Endless.display()
 
             GLB_Level_Back.display()
 
             # Button Functionality Implementation
-            if GLB_Easy.is_Clicked() or GLB_Medium.is_Clicked() or GLB_Difficult.is_Clicked():
+            ChosenLevel = 0
+            for Level, LevelButton in ((1, GLB_Easy), (2, GLB_Medium), (3, GLB_Difficult), (4, GLB_Endless)):
+                if Input.Clicked(LevelButton, ButtonDelay):
+                    ChosenLevel = Level
+            if ChosenLevel:
                 Game.LevelScreen = False
-                if GLB_Easy.is_Clicked():
-                    Game.Level = 1
-                elif GLB_Medium.is_Clicked():
-                    Game.Level = 2
-                elif GLB_Difficult.is_Clicked():
-                    Game.Level = 3
+                Game.Level = ChosenLevel
 
                 try:
                     if isinstance(SelectedCities, list) and SelectedCities:
@@ -302,36 +245,26 @@ while True:
 
                 Game.GameScreen = True
                 Game.SetMazeLevel()
-                time.sleep(ButtonDelay)
                 pygame.mixer.music.stop()
                 pygame.mixer.music.load(GameplayMusicAddress)
                 pygame.mixer.music.set_volume(0.2 * int(GamePreferences.MusicState))
                 pygame.mixer.music.play(-1)
-            elif GLB_Level_Back.is_Clicked():
+            elif Input.Clicked(GLB_Level_Back, BackButtonDelay):
                 Game.is_active = False
                 main_menu.is_active = True
-                time.sleep(BackButtonDelay)
         elif Game.GameScreen:
             screen.fill("Black")
 
-            Game.GamePlay(keys, MillisecondsPassed)
+            Game.GamePlay(keys, MillisecondsPassed, LogicSteps, Scheduler.LogicStep)
 
             # Right Background for Displaying Buttons
             screen.blit(GameRightBackground, (screen.get_height() + Game.XShift, 0))
 
             # StopWatch
-            StopWatchButton = MainMenu.MainMenuButton(screen, f"Time Elapsed = {int(Game.StopwatchValue / 1000)}s",
-                                                      GameStopwatchFont, GameStopwatchFont, TimeButtonImage,
-                                                      StopWatchButtonPos)
-            StopWatchButton.display()
+            StopWatchLabel.display_counter("Time Elapsed = ", int(Game.StopwatchValue / 1000), "s")
 
             target_label = ("GO TO " + Game.TargetCity.upper()) if getattr(Game, "TargetCity", None) else "FIND THE EXIT"
-            TargetButton = MainMenu.MainMenuButton(
-                screen, target_label,
-                GameStopwatchFont, GameStopwatchFont, TimeButtonImage,
-                (StopWatchButtonPos[0], StopWatchButtonPos[1] + 100)
-            )
-            TargetButton.display()
+            TargetLabel.display(target_label)
 
             # Change Background Button
             Game_ChangeBackground.display()
@@ -347,26 +280,31 @@ while True:
                 screen.blit(SoundControlButtonImageOff.convert_alpha(),
                             SoundControlButtonImageOff.convert_alpha().get_rect(center=GameSoundButtonPos))
 
-            if Game_Sound.is_Clicked():
+            if Input.Clicked(Game_Sound, SoundButtonDelay):
                 GamePreferences.MusicState = not GamePreferences.MusicState
                 pygame.mixer.music.set_volume(0.25 * int(GamePreferences.MusicState))
-                time.sleep(SoundButtonDelay)
-            elif Game_ChangeBackground.is_Clicked():
+            elif Input.Clicked(Game_ChangeBackground, SoundButtonDelay):
                 Game.ChangeBackground()
-                time.sleep(SoundButtonDelay)
 
             # Back Button Functionality
-            if Game_Back.is_Clicked():
-                Game.MazeGame = None
+            if Input.Clicked(Game_Back, ButtonDelay):
+                Game.CloseMaze()
                 Game.GameScreen = False
                 Game.LevelScreen = True
-                time.sleep(ButtonDelay)
                 pygame.mixer.music.stop()
                 pygame.mixer.music.load(IntroMusicAddress)
                 pygame.mixer.music.set_volume(0.25 * int(GamePreferences.MusicState))
                 pygame.mixer.music.play(-1)
 
             if Game.GameOverScreen:
+                # Rundan är klar: spara tid och progress en gång här i stället för varje frame på Game Over-skärmen
+                Scores.FinishRun(LoginScreen.user_id, Game.Level, int(Game.StopwatchValue / 1000))
+                try:
+                    if Progress.user_id is not None and ('SelectedCountry' in globals()) and SelectedCountry:
+                        Progress.complete(SelectedCountry)
+                except Exception:
+                    pass
+
                 pygame.mixer.music.stop()
                 pygame.mixer.music.load(GameOverMusicAddress)
                 pygame.mixer.music.set_volume(0.2 * int(GamePreferences.MusicState))
@@ -378,65 +316,19 @@ while True:
             GameOver_Back.display()
 
             # StopWatch
-            TimeTakenButton = MainMenu.MainMenuButton(screen, f"TIME TAKEN = {int(Game.StopwatchValue / 1000)} SEC",
-                                                      ButtonsFontInactive, ButtonsFontInactive, TimeButtonImage,
-                                                      TimeTakenButtonPos)
-            TimeTakenButton.display()
-
-            # High Score
-            Scores.UpdateScore(Game.StopwatchValue / 1000, Game.Level)
-            if hasattr(LoginScreen, "user_id") and LoginScreen.user_id is not None:
-                if not hasattr(Game, "db_recorded") or not Game.db_recorded:
-                    try:
-                        AuthDB.record_score(LoginScreen.user_id, Game.Level, int(Game.StopwatchValue / 1000))
-                    except Exception:
-                        pass
-                    Game.db_recorded = True
-
-
-                    
-                # Skriv score till DB en (1) gång
-            if hasattr(LoginScreen, "user_id") and LoginScreen.user_id is not None:
-                if not hasattr(Game, "db_recorded") or not Game.db_recorded:
-                    try:
-                        AuthDB.record_score(LoginScreen.user_id, Game.Level, int(Game.StopwatchValue / 1000))
-                    except Exception:
-                        pass
-                    Game.db_recorded = True
-
-            # High Score String
-            HighScoreString = ("NEW HIGH SCORE : " + str(int(Game.StopwatchValue / 1000)) + " SEC") if Scores.isUpdated else ("HIGH SCORE: " + Scores.HighScore(Game.Level) + " SEC")
-
-            HighScoreButton = MainMenu.MainMenuButton(screen, HighScoreString, ButtonsFontInactive, ButtonsFontInactive,
-                                                      MMButtonsImage, HighScoreButtonPos)
-            HighScoreButton.display()
-
-            # SPARA PROGRESS: exakt en gång per runda 
-            try:
-                if not hasattr(Game, "progress_recorded"):
-                    Game.progress_recorded = False  
-
-                uid = None
-                if hasattr(LoginScreen, "user_id") and LoginScreen.user_id is not None:
-                    uid = LoginScreen.user_id
-                elif hasattr(Game, "PlayerName") and Game.PlayerName:
-                    uid = AuthDB.user_id_by_username(str(Game.PlayerName))
-
-                if (uid is not None) and (not Game.progress_recorded) and ('SelectedCountry' in globals()) and SelectedCountry:
-                    AuthDB.add_country_progress(uid, SelectedCountry)
-                    Game.progress_recorded = True  
-            except Exception:
-                pass
+            TimeTakenLabel.display(f"TIME TAKEN = {int(Game.StopwatchValue / 1000)} SEC")
+
+            # High Score (framräknad en gång i Scores.FinishRun)
+            HighScoreLabel.display(Scores.HighScoreText)
 
             # Back to Main Menu
-            if GameOver_Back.is_Clicked():
-                Game.MazeGame = None
+            if Input.Clicked(GameOver_Back, BackButtonDelay):
+                Game.CloseMaze()
                 Scores.GameDone = False
                 Game.is_active = False
                 Game.GameOverScreen = False
                 Game.LevelScreen = True
                 main_menu.is_active = True
-                time.sleep(BackButtonDelay)
                 pygame.mixer.music.stop()
                 pygame.mixer.music.load(IntroMusicAddress)
                 pygame.mixer.music.set_volume(0.25 * int(GamePreferences.MusicState))
@@ -456,14 +348,12 @@ while True:
             screen.blit(SoundControlButtonImageOff.convert_alpha(), SoundControlButtonImageOff.convert_alpha().get_rect(
                 center=((WINDOW_DIM[0] / 2 + 300), (WINDOW_DIM[1] / 2 - 100))))
 
-        if GP_Sound.is_Clicked():
+        if Input.Clicked(GP_Sound, SoundButtonDelay):
             GamePreferences.MusicState = not GamePreferences.MusicState
             pygame.mixer.music.set_volume(0.25 * int(GamePreferences.MusicState))
-            time.sleep(SoundButtonDelay)
-        elif GP_Back.is_Clicked():
+        elif Input.Clicked(GP_Back, BackButtonDelay):
             GamePreferences.is_active = False
             main_menu.is_active = True
-            time.sleep(BackButtonDelay)
 
     # Scores
     if Scores.is_active:
@@ -474,9 +364,14 @@ while True:
 
         Scores_Back.display()
 
-        if Scores_Back.is_Clicked():
+        if Input.Clicked(Scores_Back, BackButtonDelay):
             Scores.is_active = False
-            time.sleep(BackButtonDelay)
             main_menu.is_active = True
 
     pygame.display.update()
+
+    # Only the intro, the animated menus and the game itself keep changing without input
+    Scheduler.EndFrame(Static=not (MillisecondsPassed < (IntroTime + 0.5) * 1000
+                                   or (main_menu.is_active and not LoginScreen.is_active)
+                                   or CountrySelectionActive
+                                   or (Game.is_active and Game.GameScreen)))
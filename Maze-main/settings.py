@@ -12,6 +12,10 @@ import Modules.Preferences as Preferences
 import Modules.Countries as Countries  # <<< ADDED (module that provides COUNTRIES)
 import Modules.Login as Login
 import Modules.AuthDB as AuthDB
+import Modules.FrameScheduler as FrameScheduler
+import Modules.Input as InputModule
+import Modules.HUDText as HUDText
+import Modules.Progress as ProgressModule
 
 
 # Suppress stderr
@@ -25,7 +29,9 @@ if not os.path.isfile('data/LeastTimes.txt'):
     with open('data/LeastTimes.txt', 'w') as f:
         f.write("1000\n1000\n1000")
 
-# Init DB (SQLite)
+# Init DB: "pickle" (data/game.pickle) or "sqlite" (data/game.sqlite, an existing pickle file is migrated once)
+DBBackend = "pickle"
+AuthDB.use_backend(DBBackend)
 AuthDB.init_db()
 
 # Initializing Pygame
@@ -35,6 +41,7 @@ pygame.mixer.init()
 
 # Defining a Quit function, which quits the pygame
 def Quit():
+    AuthDB.shutdown()
     pygame.quit()
     sys.exit()
 
@@ -58,14 +65,19 @@ def LoadScaledImage(image_path: str, scaling_factor: float = 1.0, scaling_dim: t
 WINDOW_DIM = (1440, 810)  # Three-Fourths of the most common screen resolution: 1920 * 1080
 # Clock
 clock = pygame.time.Clock()
-# General Key delay
-KeyDelay = 0.1
+# Frame rate of the screens, the game logic and static screens without input
+TargetFPS = 60
+LogicFPS = 120
+IdleFPS = 10
+Scheduler = FrameScheduler.FrameScheduler(clock, TargetFPS, LogicFPS, IdleFPS)
+# Mouse clicks and their cooldowns (ms)
+Input = InputModule.InputManager()
 # General Button delay
-ButtonDelay = 0.1
+ButtonDelay = 100
 # Back Button - General
 BackButtonBackground = LoadScaledImage("media/images/Buttons/MainMenuButton.png", scaling_dim=(300, 100))
 BackButtonPos = ((WINDOW_DIM[0] / 2), (WINDOW_DIM[1] * 5 / 6))
-BackButtonDelay = 0.5
+BackButtonDelay = 500
 
 # Sounds
 ButtonSound = pygame.mixer.Sound("media/sounds/ButtonClick.wav")
@@ -137,6 +149,9 @@ GameOverMusicAddress = "media/sounds/GameOver.wav"
 
 HighScoreButtonPos = (WINDOW_DIM[0] / 2, WINDOW_DIM[1] / 2 + 75)
 
+# Rendered texts of the HUD, the Game Over screen and the leaderboard
+TextCache = HUDText.TextCache()
+
 # Scores
 #    High Scores CSV File Address
 HighScoresCSV_Address = "data/LeastTimes.txt"
@@ -178,23 +193,31 @@ MazeImagesPath = "media/images/MazeBackground"
 Game = PlayGame.GamePlay(screen, PlayerName, PlayerImagesPath, MazeImagesPath, SolutionPathFileAddress, GameOverPNG_Address)
 #    Game Level Buttons
 EasyPos = (WINDOW_DIM[0] / 2, 100)
-MediumPos = (WINDOW_DIM[0] / 2, 300)
-DifficultPos = (WINDOW_DIM[0] / 2, 500)
+MediumPos = (WINDOW_DIM[0] / 2, 240)
+DifficultPos = (WINDOW_DIM[0] / 2, 380)
+EndlessPos = (WINDOW_DIM[0] / 2, 520)
 GLB_Easy = MainMenu.MainMenuButton(screen, "EASY (20 X 20)", ButtonsFontInactive, ButtonsFontActive, MMButtonsImage, EasyPos,
                                    ButtonSound)
 GLB_Medium = MainMenu.MainMenuButton(screen, "MEDIUM (40 X 40)", ButtonsFontInactive, ButtonsFontActive, MMButtonsImage,
                                      MediumPos, ButtonSound)
 GLB_Difficult = MainMenu.MainMenuButton(screen, "DIFFICULT (60 X 60)", ButtonsFontInactive, ButtonsFontActive, MMButtonsImage,
                                         DifficultPos, ButtonSound)
+GLB_Endless = MainMenu.MainMenuButton(screen, "ENDLESS (200 DEEP)", ButtonsFontInactive, ButtonsFontActive, MMButtonsImage,
+                                      EndlessPos, ButtonSound)
 
 GLB_Level_Back = MainMenu.MainMenuButton(screen, "BACK", ButtonsFontInactive, ButtonsFontActive, BackButtonBackground,
                                          BackButtonPos, ButtonSound)
 
 #    Game
+StopWatchLabel = HUDText.HUDLabel(screen, TextCache, GameStopwatchFont, TimeButtonImage, StopWatchButtonPos)
+TargetLabel = HUDText.HUDLabel(screen, TextCache, GameStopwatchFont, TimeButtonImage,
+                               (StopWatchButtonPos[0], StopWatchButtonPos[1] + 100))
 GameRightBackground = MainMenuBackground[0].subsurface(pygame.Rect(screen.get_height() + Game.XShift, 0, screen.get_width() - (screen.get_height() + Game.XShift), screen.get_height()))
 
 # Game Over
 GameOver_Back = MainMenu.MainMenuButton(screen, "MAIN MENU", ButtonsFontInactive, ButtonsFontActive, BackButtonBackground, BackButtonPos, ButtonSound)
+TimeTakenLabel = HUDText.HUDLabel(screen, TextCache, ButtonsFontInactive, TimeButtonImage, TimeTakenButtonPos)
+HighScoreLabel = HUDText.HUDLabel(screen, TextCache, ButtonsFontInactive, MMButtonsImage, HighScoreButtonPos)
 
 #        GameButtons
 GameSoundButtonPos = ((screen.get_height() + screen.get_width()) / 2 + Game.XShift / 2, screen.get_height() / 2 + 100)
@@ -211,7 +234,7 @@ ChangeThemeButtonPos = ((screen.get_height() + screen.get_width()) / 2 + Game.XS
 Game_ChangeBackground = MainMenu.MainMenuButton(screen, "CHANGE THEME", ButtonsFontInactive, ButtonsFontActive, GameButtonImage, ChangeThemeButtonPos, ButtonSound)
 
 # Scores
-Scores = Scores.HighScores(screen, HighScoresCSV_Address, ButtonsFontActive)
+Scores = Scores.HighScores(screen, HighScoresCSV_Address, ButtonsFontActive, TextCache)
 Scores_Back = MainMenu.MainMenuButton(screen, "BACK", ButtonsFontInactive, ButtonsFontActive, BackButtonBackground, BackButtonPos, ButtonSound)
 
 # Preferences
@@ -224,13 +247,15 @@ GP_MusicText = MainMenu.MainMenuButton(screen, "MUSIC:", ButtonsFontActive, Butt
 SoundClickTimestamp = 10
 GP_Sound = MainMenu.MainMenuButton(screen, "", ButtonsFontInactive, ButtonsFontActive, SoundControlButtonImageOn,
                                    ((WINDOW_DIM[0] / 2 + 300), (WINDOW_DIM[1] / 2 - 100)), ButtonSound)
-SoundButtonDelay = 0.3
+SoundButtonDelay = 300
 
 GP_Back = MainMenu.MainMenuButton(screen, "BACK", ButtonsFontInactive, ButtonsFontActive, BackButtonBackground,
                                   BackButtonPos, ButtonSound)
 
 # -------------------- COUNTRIES: STATE + BUTTONS --------------------
 CountrySelectionActive = False
+# Inloggade spelarens progress (laddas vid inloggning)
+Progress = ProgressModule.ProgressService(Countries.COUNTRIES)
 SelectedCountry = None
 SelectedCities = []
 SelectedTargetCity = None